@@ -1,4 +1,4 @@
-import pandas as pd
+ACTION_COLUMNS = ["country", "language", "platform", "values", "rev_date", "slug", "experiment_slug", "is_latest_rev", "fingerprint", "source_text", "source_language", "translation_strategy"]
 
 
 def ActionDataFrame():
@@ -8,4 +8,6 @@ def ActionDataFrame():
     Returns:
         DataFrame: An empty DataFrame with the specified columns.
     """
-    return pd.DataFrame(columns=["country", "language", "platform", "values", "rev_date", "slug", "experiment_slug", "is_latest_rev"])
\ No newline at end of file
+    import pandas as pd
+
+    return pd.DataFrame(columns=ACTION_COLUMNS)
\ No newline at end of file
@@ -1,10 +1,17 @@
 import argparse
 import logging
+import os
 
+from alexlab_if.action_stream import iter_actions
+from alexlab_if.estimation import estimate_templates
 from alexlab_if.interpolate_templates import interpolate_templates
+from alexlab_if.run_journal import RunJournal
+from alexlab_if.skeleton_translation import TRANSLATION_STRATEGIES
 
 from alexlab_if.translation import TranslationService
-from alexlab_if.utils import country_language_pairs, valid_filepath_type, existing_filepath_type
+from alexlab_if.translation_memory import TRANSLATION_MEMORY_POLICIES, TranslationMemory
+from alexlab_if.watch import watch_templates
+from alexlab_if.utils import country_language_pairs, positive_int, translation_endpoint, valid_filepath_type, existing_filepath_type
 
 logger = logging.getLogger()
 
@@ -16,16 +23,68 @@ def main():
         "--translate", action=argparse.BooleanOptionalAction, default=True
     )
     parser.add_argument(
-        "--hf-space", type=str, default='aiforensics/opus-mt-translation-ce'
+        "--hf-space", type=translation_endpoint, nargs='+', default=[('aiforensics/opus-mt-translation-ce', 1.0)],
+        help='<Optional> One or more replicas of the translation space, space-separated, optionally weighted, e.g.: --hf-space localhost:7860=2 localhost:7861'
     )
     parser.add_argument(
         "--hf-token", type=str, default=None
     )
+    parser.add_argument(
+        "--warm-translation-cache", action=argparse.BooleanOptionalAction, default=True,
+        help='Reuse the translations found in the existing output file'
+    )
+    parser.add_argument(
+        "--translation-strategy", choices=TRANSLATION_STRATEGIES, default="full",
+        help='Translate whole interpolations, or each template and argument separately when the language allows it'
+    )
+    parser.add_argument(
+        "--translation-memory", choices=TRANSLATION_MEMORY_POLICIES, default=None,
+        help='<Optional> Look for nearly identical texts among the past translations, and either flag or reuse them'
+    )
+    parser.add_argument(
+        "--translation-memory-threshold", type=float, default=0.9,
+        help='<Optional> Similarity from which past translations are near matches, between 0 and 1'
+    )
+    parser.add_argument(
+        "--deadline", type=float, default=None,
+        help='<Optional> Number of seconds after which the remaining interpolations are deferred to a resumed run'
+    )
+    parser.add_argument(
+        "--translation-budget", type=int, default=None,
+        help='<Optional> Number of remote translations after which the remaining interpolations are deferred to a resumed run'
+    )
+    parser.add_argument(
+        "--pipeline-queue-size", type=positive_int, default=2,
+        help='<Optional> Number of templates or batches a stage of the run can get ahead of the next one'
+    )
     parser.add_argument(
         "--dry-run", action=argparse.BooleanOptionalAction, default=False
     )
     parser.add_argument(
-        "--input-templates", type=existing_filepath_type, required=True
+        "--estimate", action=argparse.BooleanOptionalAction, default=False,
+        help='Only estimate the changes arithmetically, without rendering the interpolations'
+    )
+    parser.add_argument(
+        "--resume", action=argparse.BooleanOptionalAction, default=False,
+        help='Continue an interrupted run from its journal, skipping the completed translations and templates'
+    )
+    parser.add_argument(
+        "--watch", action=argparse.BooleanOptionalAction, default=False,
+        help='Keep running and regenerate the actions of the affected templates each time the input files change, retrying failed templates until they succeed. Removed templates and arguments keep their actions'
+    )
+    parser.add_argument(
+        "--serve", action=argparse.BooleanOptionalAction, default=False,
+        help='Serve a local HTTP service rendering the templates submitted to it, instead of the input templates'
+    )
+    parser.add_argument(
+        "--host", type=str, default="127.0.0.1", help='<Optional> Interface the HTTP service listens on'
+    )
+    parser.add_argument(
+        "--port", type=int, default=8000, help='<Optional> Port the HTTP service listens on'
+    )
+    parser.add_argument(
+        "--input-templates", type=existing_filepath_type, required=False,
+        help='Required, except with --serve'
     )
     parser.add_argument(
         "--input-arguments", type=existing_filepath_type, required=True
@@ -38,7 +97,27 @@ def main():
     )
     args = parser.parse_args()
 
-    translation_service = TranslationService(args.hf_space, args.hf_token)
+    # Served templates are submitted over HTTP, the estimate still needs the file
+    if args.input_templates is None and (args.estimate or not args.serve):
+        parser.error("the following arguments are required: --input-templates")
+
+    if args.estimate:
+        estimate_templates(
+            output_path=args.output,
+            extra_country_languages=[country_language_pairs(cl) for cl in args.ecl],
+            input_template_path=args.input_templates,
+            input_argument_path=args.input_arguments,
+        )
+        return
+
+    translation_service = TranslationService(
+        gradio_src=[src for (src, _) in args.hf_space],
+        hf_token=args.hf_token,
+        weights=[weight for (_, weight) in args.hf_space],
+        memory=TranslationMemory(
+            threshold=args.translation_memory_threshold, policy=args.translation_memory
+        ) if args.translation_memory else None,
+    )
 
     import_args = {
         "should_translate": args.translate,        
@@ -46,10 +125,61 @@ def main():
         "input_template_path": args.input_templates,
         "input_argument_path": args.input_arguments,
         "output_path": args.output,
-        "translation_service": translation_service
-        
+        "translation_service": translation_service,
+        "warm_translation_cache": args.warm_translation_cache,
+        "translation_strategy": args.translation_strategy,
+        "deadline": args.deadline,
+        "translation_budget": args.translation_budget,
+        "pipeline_queue_size": args.pipeline_queue_size,
     }
 
+    if args.serve:
+        # The HTTP server costs more to import than the rest of the package
+        from alexlab_if.render_service import RenderService, serve_render_service
+
+        serve_render_service(
+            args.host,
+            args.port,
+            RenderService(
+                output_path=args.output,
+                input_argument_path=args.input_arguments,
+                translation_service=translation_service if args.translate else None,
+                extra_country_languages=import_args["extra_country_languages"],
+                warm_translation_cache=args.warm_translation_cache,
+                translation_strategy=args.translation_strategy,
+            ),
+        )
+        return
+
+    # Watching was explicitly requested, so changes are applied without confirmation, unless it's a dry run
+    if args.watch:
+        watch_templates(
+            output_path=args.output,
+            should_translate=args.translate,
+            extra_country_languages=import_args["extra_country_languages"],
+            input_template_path=args.input_templates,
+            input_argument_path=args.input_arguments,
+            dry_run=args.dry_run,
+            translation_service=translation_service,
+            warm_translation_cache=args.warm_translation_cache,
+            translation_strategy=args.translation_strategy,
+        )
+        return
+
+    # An interrupted run was already confirmed, so it is resumed straight away
+    if args.resume and os.path.isfile(RunJournal.path_for(args.output)):
+        interpolate_templates(**import_args, dry_run=False, resume=True)
+        return
+
+    # Starting over would lose the translations journaled by an interrupted run
+    journal = RunJournal(RunJournal.path_for(args.output))
+    if journal.exists() and not args.dry_run:
+        confirm = input(f"{journal.path} was left by an interrupted run, discard it instead of using --resume? [y/n]")
+        if confirm != "y":
+            print("Aborted")
+            exit()
+        journal.remove()
+
     # Always launch a dry run first
     interpolate_templates(**import_args, dry_run=True)
 
@@ -0,0 +1,363 @@
+from itertools import islice
+import logging
+from typing import Callable, Iterable, Iterator, Optional
+
+from alexlab_if.alexlab_models import (
+    AlexlabAction,
+    AlexlabInterpolation,
+    AlexlabTemplate,
+    ArgumentIndex,
+    DiffStatus,
+    LanguageEnum,
+    PlatformEnum,
+)
+from alexlab_if.bulk_diff import bulk_diff, template_candidates
+from alexlab_if.keyword_extraction import prompt_to_search_query
+from alexlab_if.skeleton_translation import compose_skeleton, is_skeleton_translatable, skeleton_survives, template_skeleton
+from alexlab_if.slug_table import SlugTable
+from alexlab_if.template_rendering import PromptCounter, iter_interpolations
+from alexlab_if.translation import TranslationService
+from alexlab_if.utils import shorten
+
+logger = logging.getLogger()
+
+# (platform, diff status, id of the existing record with the same slug)
+PlatformDiff = tuple[PlatformEnum, DiffStatus, Optional[int]]
+
+
+def diff_interpolations(
+    template: AlexlabTemplate,
+    interpolations: list[AlexlabInterpolation],
+    existing_index: SlugTable,
+) -> list[tuple[AlexlabInterpolation, list[PlatformDiff]]]:
+    """
+    Classifies the interpolations of a template against the existing records, for each of its target platforms.
+
+    Args:
+        template (AlexlabTemplate): The template the interpolations come from.
+        interpolations (list[AlexlabInterpolation]): The interpolations to classify.
+        existing_index (SlugTable): The existing records, indexed by slug.
+
+    Returns:
+        list: The interpolations, each with the diff status of every target platform.
+            Interpolations with new or updated platforms get them as target platforms.
+    """
+    # Candidate actions in the order of the interpolations, then of the platforms
+    diff = bulk_diff(template_candidates(template, interpolations), existing_index)
+    diff_statuses = iter(diff.statuses().tolist())
+    existing_ids = iter(diff.existing_ids.tolist())
+
+    diffs = []
+    for interpolation in interpolations:
+        # Case 1: never existed
+        # Case 2: exists and is the same (template string is the same, argument slug is the same)
+        # Case 3: exists and only its revision date got bumped, no need to regenerate it
+        # Case 4: exists but got an update
+        platform_diffs = []
+        for platform in template.target_platforms:
+            diff_status, existing_id = next(diff_statuses), next(existing_ids)
+            platform_diffs.append(
+                (platform, diff_status, existing_id if diff_status != DiffStatus.new else None)
+            )
+
+        target_platforms = [
+            platform for platform, diff_status, _ in platform_diffs
+            if diff_status in (DiffStatus.new, DiffStatus.upd)
+        ]
+        if len(target_platforms) > 0:
+            interpolation.target_platforms = target_platforms
+
+        diffs.append((interpolation, platform_diffs))
+
+    return diffs
+
+
+def print_diff_report(interpolation: AlexlabInterpolation, platform_diffs: list[PlatformDiff]):
+    """
+    Prints the platforms of an interpolation grouped by diff status.
+
+    Args:
+        interpolation (AlexlabInterpolation): The interpolation to report on.
+        platform_diffs (list[PlatformDiff]): The diff status of every target platform.
+    """
+    prefix = f"{interpolation.country.value} {interpolation.language.value} {' '.join(interpolation.arguments)}"
+    for diff_status in [DiffStatus.new, DiffStatus.dup, DiffStatus.upd, DiffStatus.meta]:
+        platforms = [platform.value for platform, status, _ in platform_diffs if status == diff_status]
+        if len(platforms) > 0:
+            print(
+                f"{diff_status.name.upper()} {prefix}:\t{','.join (map(shorten, platforms))}",
+            )
+
+
+def translate_interpolations(
+    interpolations: list[AlexlabInterpolation],
+    translation_service: TranslationService,
+    on_translated: Callable[[str, LanguageEnum, LanguageEnum, str], None] = None,
+    strategy: str = "full",
+):
+    """
+    Translates the interpolations which aren't in their target language yet, in place.
+
+    With the skeleton strategy, the template is translated once per language with its placeholder
+    masked, and each argument once per language: a template with A arguments in T languages needs
+    T + A×T translations instead of A×T. It only saves translations when other templates share the
+    arguments, as their translations are then found in the cache. Interpolations in inflected
+    languages, or whose masked placeholder doesn't survive the translation, are translated as full
+    sentences.
+
+    Args:
+        interpolations (list[AlexlabInterpolation]): The interpolations to translate.
+        translation_service (TranslationService): The service to use for translations.
+        on_translated (Callable, optional): Called with (text, source_lang, target_lang, translation) as soon as each distinct text is translated remotely.
+        strategy (str, optional): Either "full" to translate whole interpolations, or "skeleton" to translate the template and the arguments separately.
+    """
+    interpolations_to_translate = [
+        interpolation for interpolation in interpolations if not interpolation.is_translated
+    ]
+    if not interpolations_to_translate:
+        return
+    if not translation_service:
+        raise ValueError("Translation service is required for translation.")
+
+    if strategy == "skeleton":
+        interpolations_to_translate = _translate_skeletons(
+            interpolations_to_translate, translation_service, on_translated
+        )
+        if not interpolations_to_translate:
+            return
+
+    translations = translation_service.translate_many(
+        [
+            (interpolation.text, interpolation.template.language, interpolation.language)
+            for interpolation in interpolations_to_translate
+        ],
+        on_translated=on_translated,
+    )
+    for interpolation, translation in zip(interpolations_to_translate, translations):
+        interpolation.source_text = interpolation.text
+        interpolation.text = translation
+        interpolation.is_translated = True
+        interpolation.translation_strategy = "full"
+
+
+def _translate_skeletons(
+    interpolations: list[AlexlabInterpolation],
+    translation_service: TranslationService,
+    on_translated: Callable[[str, LanguageEnum, LanguageEnum, str], None] = None,
+) -> list[AlexlabInterpolation]:
+    """
+    Translates the interpolations which allow it as their skeleton and their argument, in place.
+
+    Returns:
+        list: The interpolations which still need to be translated as full sentences.
+    """
+    skeleton_interpolations = [
+        interpolation for interpolation in interpolations if is_skeleton_translatable(interpolation)
+    ]
+    if not skeleton_interpolations:
+        return interpolations
+
+    # Skeletons are the same for every batch of a template, so they are only translated once thanks to the cache
+    skeletons = [
+        template_skeleton(interpolation.template.values, interpolation.placeholder)
+        for interpolation in skeleton_interpolations
+    ]
+    translated_skeletons = translation_service.translate_many(
+        [
+            (skeleton, interpolation.template.language, interpolation.language)
+            for interpolation, skeleton in zip(skeleton_interpolations, skeletons)
+        ],
+        on_translated=on_translated,
+    )
+
+    # The arguments are only translated for the skeletons which can be composed
+    accepted = [
+        (interpolation, skeleton, translated_skeleton)
+        for interpolation, skeleton, translated_skeleton in zip(skeleton_interpolations, skeletons, translated_skeletons)
+        if skeleton_survives(skeleton, translated_skeleton)
+    ]
+    translated_arguments = translation_service.translate_many(
+        [
+            (interpolation.arguments[0], interpolation.template.language, interpolation.language)
+            for interpolation, _, _ in accepted
+        ],
+        on_translated=on_translated,
+    ) if accepted else []
+
+    composed = set()
+    for (interpolation, skeleton, translated_skeleton), translated_argument in zip(accepted, translated_arguments):
+        interpolation.source_text = interpolation.text
+        interpolation.text = compose_skeleton(skeleton, translated_skeleton, translated_argument)
+        interpolation.is_translated = True
+        interpolation.translation_strategy = "skeleton"
+        composed.add(id(interpolation))
+
+    fallbacks = len(skeleton_interpolations) - len(composed)
+    if fallbacks:
+        logger.warning(
+            f"The placeholder marker didn't survive the translation of {fallbacks} skeletons, translating them as full sentences"
+        )
+
+    return [interpolation for interpolation in interpolations if id(interpolation) not in composed]
+
+
+def interpolation_actions(
+    interpolation: AlexlabInterpolation,
+    platform_diffs: list[PlatformDiff],
+    include_dup: bool = False,
+) -> Iterator[AlexlabAction]:
+    """
+    Generates the actions of an interpolation, turning it into a search query for search platforms.
+
+    Args:
+        interpolation (AlexlabInterpolation): The interpolation, already translated if needed.
+        platform_diffs (list[PlatformDiff]): The diff status of every target platform.
+        include_dup (bool, optional): Whether to also yield the actions which are unchanged.
+
+    Yields:
+        AlexlabAction: The actions of the interpolation. Only new and updated actions have values.
+    """
+    for platform, diff_status, existing_record_id in platform_diffs:
+        if diff_status == DiffStatus.dup and not include_dup:
+            continue
+
+        values = None
+        if diff_status in (DiffStatus.new, DiffStatus.upd):
+            values = (
+                prompt_to_search_query(
+                    interpolation.text, interpolation.language
+                )
+                if platform.is_search_engine
+                else interpolation.text
+            )
+
+        yield AlexlabAction(
+            country=interpolation.country.value,
+            language=interpolation.language.value,
+            platform=platform,
+            values=values,
+            rev_date=interpolation.rev_date,
+            slug=interpolation.slug,
+            experiment_slug=interpolation.experiment_slug,
+            is_latest_rev=True,
+            fingerprint=interpolation.fingerprint,
+            source_text=interpolation.source_text,
+            source_language=interpolation.template.language.value,
+            translation_strategy=interpolation.translation_strategy,
+            diff_status=diff_status,
+            existing_record_id=existing_record_id,
+        )
+
+
+def diff_actions(
+    diffs: Iterable[tuple[AlexlabInterpolation, list[PlatformDiff]]],
+    translation_service: TranslationService = None,
+    should_translate: bool = True,
+    include_dup: bool = False,
+    on_translated: Callable[[str, LanguageEnum, LanguageEnum, str], None] = None,
+    batch_size: int = 100,
+    report: bool = False,
+    translation_strategy: str = "full",
+) -> Iterator[AlexlabAction]:
+    """
+    Translates classified interpolations in batches and turns them into actions, yielding them one at a time.
+
+    Args:
+        diffs (Iterable): The interpolations, each with the diff status of every target platform, as returned by diff_interpolations.
+        translation_service (TranslationService, optional): The service to use for translations.
+        should_translate (bool, optional): Whether to translate the interpolations.
+        include_dup (bool, optional): Whether to also yield the actions which are unchanged.
+        on_translated (Callable, optional): Called with (text, source_lang, target_lang, translation) as soon as each distinct text is translated remotely.
+        batch_size (int, optional): The number of interpolations translated together.
+        report (bool, optional): Whether to print the diff report.
+        translation_strategy (str, optional): Either "full" or "skeleton", see translate_interpolations.
+
+    Yields:
+        AlexlabAction: The new, updated and metadata-only actions, and the unchanged ones if include_dup.
+    """
+    diffs = iter(diffs)
+    while batch := list(islice(diffs, batch_size)):
+        if report:
+            for interpolation, platform_diffs in batch:
+                print_diff_report(interpolation, platform_diffs)
+
+        if should_translate:
+            translate_interpolations(
+                [interpolation for interpolation, _ in batch if interpolation.target_platforms],
+                translation_service,
+                on_translated,
+                translation_strategy,
+            )
+
+        for interpolation, platform_diffs in batch:
+            yield from interpolation_actions(interpolation, platform_diffs, include_dup)
+
+
+def iter_actions(
+    templates: Iterable[AlexlabTemplate],
+    arguments: ArgumentIndex,
+    existing_index: SlugTable,
+    extra_country_languages = [],
+    translation_service: TranslationService = None,
+    should_translate: bool = True,
+    include_dup: bool = False,
+    on_translated: Callable[[str, LanguageEnum, LanguageEnum, str], None] = None,
+    batch_size: int = 100,
+    report: bool = False,
+    counter: PromptCounter = None,
+    translation_strategy: str = "full",
+) -> Iterator[AlexlabAction]:
+    """
+    Renders, classifies, translates and turns the templates into actions, yielding them one at a time.
+
+    The interpolations are rendered, classified and translated a batch at a time, so only a batch
+    of interpolations of a single template is held in memory at any time, and the actions can be
+    consumed as they are produced, e.g. written to a file or sent to a scheduler.
+
+    Args:
+        templates (Iterable[AlexlabTemplate]): The templates, as loaded by load_templates_from_csv.
+        arguments (ArgumentIndex): The arguments by placeholder, as loaded by load_arguments_from_csv.
+        existing_index (SlugTable): The existing records indexed by slug, as built by build_slug_index.
+        extra_country_languages (list, optional): Additional country-language pairs.
+        translation_service (TranslationService, optional): The service to use for translations.
+        should_translate (bool, optional): Whether to translate the interpolations.
+        include_dup (bool, optional): Whether to also yield the actions which are unchanged.
+        on_translated (Callable, optional): Called with (text, source_lang, target_lang, translation) as soon as each distinct text is translated remotely.
+        batch_size (int, optional): The number of interpolations translated together.
+        report (bool, optional): Whether to print the template and diff reports.
+        counter (PromptCounter, optional): A counter for tracking the number of interpolations.
+        translation_strategy (str, optional): Either "full" or "skeleton", see translate_interpolations.
+
+    Yields:
+        AlexlabAction: The new, updated and metadata-only actions, and the unchanged ones if include_dup.
+    """
+    if not isinstance(arguments, ArgumentIndex):
+        arguments = ArgumentIndex(arguments.values())
+
+    for template in templates:
+        interpolations = iter_interpolations(
+            template=template,
+            variables=arguments,
+            counter=counter or PromptCounter(),
+            extra_country_languages=extra_country_languages,
+            report=report,
+        )
+        # Rendered and classified lazily, one batch at a time, as diff_actions consumes them
+        diffs = (
+            diff
+            for batch in iter(lambda: list(islice(interpolations, batch_size)), [])
+            for diff in diff_interpolations(template, batch, existing_index)
+        )
+        if report:
+            print("\nChanges")
+
+        yield from diff_actions(
+            diffs,
+            translation_service=translation_service,
+            should_translate=should_translate,
+            include_dup=include_dup,
+            on_translated=on_translated,
+            batch_size=batch_size,
+            report=report,
+            translation_strategy=translation_strategy,
+        )
@@ -1,13 +1,19 @@
-from functools import cached_property
+from functools import cached_property, lru_cache
+import hashlib
 from pydantic import BaseModel, validator
-from typing import Optional
+from types import MappingProxyType
+from typing import Iterable, Iterator, Mapping, NamedTuple, Optional
 import enum
-from aenum import Enum as AEnum, extend_enum
 import re
 
-from jinja2 import Environment, meta
+from alexlab_if.ActionDataFrame import ACTION_COLUMNS
 
-ALEXLAB_JINJA_ENV = Environment(variable_start_string="{{", variable_end_string="}}")
+
+@lru_cache
+def alexlab_jinja_env():
+    from jinja2 import Environment
+
+    return Environment(variable_start_string="{{", variable_end_string="}}")
 
 class LanguageEnum(str, enum.Enum):
     NA = 0
@@ -53,7 +59,7 @@ region_mapping = {**subregion_mapping, **country_mapping, **{value: value for va
 # The class was originally overloaded to also inadvertently
 # include Bavaria and Hessen this should be called RegionEnum
 # when we're able to replace all its invocations lying around
-class CountryEnum(AEnum):  
+class _CountryEnum(enum.Enum):  
     def __str__(self): return self.name
     def to_cc(self): return region_mapping[self.name]
 
@@ -62,13 +68,17 @@ class CountryEnum(AEnum):
     def to_languages(self) -> list[LanguageEnum]:
         return [LanguageEnum(self.value), LanguageEnum.en]
 
-for key in region_mapping.keys():
-    extend_enum(CountryEnum, key, key)
+# Members are generated from the region mapping with the standard
+# functional API, rather than extending the class member by member
+CountryEnum = _CountryEnum(
+    "CountryEnum", [(key, key) for key in region_mapping.keys()], module=__name__
+)
 
 class DiffStatus(str, enum.Enum):
     new = "new"
     upd = "upd"
     dup = "dup"
+    meta = "meta"
 
 
 class PlatformEnum(str, enum.Enum):
@@ -113,6 +123,61 @@ class AlexlabVariable(BaseModel):
     arguments: list[PlaceholderArgument]
 
 
+class IndexedArgument(NamedTuple):
+    """
+    An argument value along with its precomputed slug.
+    """
+    value: str
+    slug: str
+
+
+class ArgumentIndex(Mapping[str, AlexlabVariable]):
+    """
+    Immutable index of the variables, built once per run and shared by all templates.
+
+    It behaves as a mapping from each placeholder to its variable, and additionally
+    maps each placeholder to the non-discarded argument values of each country.
+    """
+
+    def __init__(self, variables: Iterable[AlexlabVariable]):
+        self._variables = MappingProxyType({variable.placeholder: variable for variable in variables})
+
+        by_placeholder = {}
+        for placeholder, variable in self._variables.items():
+            by_country: dict[CountryEnum, list[IndexedArgument]] = {}
+            for argument in variable.arguments:
+                if argument.status == ArgumentStatus.discarded:
+                    continue
+                indexed_argument = IndexedArgument(argument.value, AlexlabInterpolation.sluggify(argument.value))
+                for country in argument.countries:
+                    by_country.setdefault(country, []).append(indexed_argument)
+            by_placeholder[placeholder] = MappingProxyType(
+                {country: tuple(arguments) for country, arguments in by_country.items()}
+            )
+        self._by_placeholder = MappingProxyType(by_placeholder)
+
+    def __getitem__(self, placeholder: str) -> AlexlabVariable:
+        return self._variables[placeholder]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._variables)
+
+    def __len__(self) -> int:
+        return len(self._variables)
+
+    def arguments_by_country(self, placeholder: str) -> Mapping[CountryEnum, tuple[IndexedArgument, ...]]:
+        """
+        Retrieves the non-discarded arguments of a placeholder, by country.
+
+        Args:
+            placeholder (str): The placeholder name.
+
+        Returns:
+            Mapping: A read-only mapping from each country to its arguments.
+        """
+        return self._by_placeholder[placeholder]
+
+
 class AlexlabTemplate(BaseModel):
     """
     Represents a template for generating prompts.
@@ -127,6 +192,8 @@ class AlexlabTemplate(BaseModel):
         status (str): The status of the template.
         rev_date (str): The revision date of the template.
         experiment_slug (str): The experiment slug associated with the template.
+        priority (Optional[int]): The priority of the template, lower being more urgent, None if unset.
+        min_samples (int): The number of interpolations to produce before filling in the remainder of any template.
     """
     name: str
     values: str
@@ -137,6 +204,8 @@ class AlexlabTemplate(BaseModel):
     status: str  # TODO: StatusEnum?
     rev_date: str
     experiment_slug: str
+    priority: Optional[int] = None
+    min_samples: int = 0
 
     @property
     def placeholders(self) -> list[str]:
@@ -146,10 +215,31 @@ class AlexlabTemplate(BaseModel):
         Returns:
             list: A list of placeholders in the template string.
         """
+        from jinja2 import meta
+
         return list(meta.find_undeclared_variables(
-            ALEXLAB_JINJA_ENV.parse(self.values)
+            alexlab_jinja_env().parse(self.values)
         ))
 
+    @property
+    def fingerprint(self) -> str:
+        """
+        Computes a fingerprint of every field of the template.
+
+        Returns:
+            str: A 64-bit hexadecimal fingerprint.
+        """
+        return hashlib.sha256(self.json(encoder=str).encode("utf-8")).hexdigest()[:16]
+
+    @validator('priority', 'min_samples', pre=True)
+    def blank_to_default(cls, v, field):
+        """
+        Treats the blank cells of the CSV file as unset.
+        """
+        if isinstance(v, str) and not v.strip():
+            return field.default
+        return v
+
     @validator('values')
     def canonise_values(cls, v):
         """
@@ -185,7 +275,10 @@ class AlexlabInterpolation(BaseModel):
         template (AlexlabTemplate): The template used for the interpolation.
         target_platforms (Optional[list[PlatformEnum]]): The list of target platforms for the interpolation.
         arguments (list[str]): The list of arguments used in the interpolation.
+        argument_slugs (Optional[list[str]]): The precomputed slugs of the arguments, if any.
         is_translated (bool): Indicates whether the interpolation is translated.
+        source_text (Optional[str]): The interpolated text before translation, once translated.
+        translation_strategy (Optional[str]): How the interpolation was translated, either "full" or "skeleton", once translated.
         is_latest_rev (bool): Indicates whether this is the latest revision of the interpolation.
     """    
     language: LanguageEnum
@@ -196,18 +289,94 @@ class AlexlabInterpolation(BaseModel):
     template: AlexlabTemplate
     target_platforms: Optional[list[PlatformEnum]] = []
     arguments: list[str]
+    argument_slugs: Optional[list[str]] = None
     is_translated: bool
+    source_text: Optional[str] = None
+    translation_strategy: Optional[str] = None
     is_latest_rev = True
 
     @staticmethod
     def sluggify(s: str) -> str:
         return s.strip().lower().replace(" ", "-").replace("\n", "-")
 
+    @classmethod
+    def make_slug(cls, template_name: str, country: CountryEnum, language: LanguageEnum, arguments: list[str], argument_slugs: Optional[list[str]] = None) -> str:
+        values_to_use_in_slug = [template_name, country.value, language.value]
+        if argument_slugs is None:
+            values_to_use_in_slug += arguments
+            argument_slugs = []
+        return "__".join([cls.sluggify(v) for v in values_to_use_in_slug] + argument_slugs)
+
     @property
     def slug(self) -> str:
-        values_to_use_in_slug = [self.template.name, self.country.value, self.language.value, *self.arguments]
-        return "__".join([self.sluggify(v) for v in values_to_use_in_slug])
+        return self.make_slug(self.template.name, self.country, self.language, self.arguments, self.argument_slugs)
+
+    @staticmethod
+    def make_fingerprint(values: str, source_language: LanguageEnum, language: LanguageEnum, arguments: list[str]) -> str:
+        """
+        Computes a fingerprint of the content an interpolation is generated from.
+
+        Args:
+            values (str): The canonical template string.
+            source_language (LanguageEnum): The language of the template.
+            language (LanguageEnum): The target language of the interpolation.
+            arguments (list[str]): The arguments used in the interpolation.
+
+        Returns:
+            str: A 64-bit hexadecimal fingerprint.
+        """
+        content = "\x1f".join([values, source_language.value, language.value, *arguments])
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+    @property
+    def fingerprint(self) -> str:
+        return self.make_fingerprint(self.template.values, self.template.language, self.language, self.arguments)
 
     @property
     def experiment_slug(self) -> str:
-        return self.template.experiment_slug
\ No newline at end of file
+        return self.template.experiment_slug
+
+class AlexlabAction(BaseModel):
+    """
+    Represents a user action generated from an interpolation for a given platform, along with how it compares to the existing actions.
+
+    Attributes:
+        country (str): The country code of the action.
+        language (str): The language code of the action.
+        platform (PlatformEnum): The platform of the action.
+        values (Optional[str]): The prompt or search query, only generated for new and updated actions.
+        rev_date (str): The revision date of the action.
+        slug (str): The slug of the interpolation the action comes from.
+        experiment_slug (str): The experiment slug associated with the template.
+        is_latest_rev (bool): Indicates whether this is the latest revision of the action.
+        fingerprint (str): The content fingerprint of the interpolation the action comes from.
+        source_text (Optional[str]): The interpolated text before translation, if translated.
+        translation_strategy (Optional[str]): How the text was translated, either "full" or "skeleton", if translated.
+        source_language (str): The language code of the template.
+        diff_status (DiffStatus): How the action compares to the existing ones.
+        existing_record_id (Optional[int]): The id of the existing record with the same slug, which is outdated by an upd action
+            or whose revision date is bumped by a meta action.
+    """
+    country: str
+    language: str
+    platform: PlatformEnum
+    values: Optional[str]
+    rev_date: str
+    slug: str
+    experiment_slug: str
+    is_latest_rev = True
+    fingerprint: str
+    source_text: Optional[str]
+    source_language: str
+    translation_strategy: Optional[str] = None
+    diff_status: DiffStatus
+    existing_record_id: Optional[int] = None
+
+    def to_record(self) -> dict:
+        """
+        Converts the action to a row of the list of actions.
+
+        Returns:
+            dict: The action, restricted to the columns of the list of actions.
+        """
+        return {column: getattr(self, column) for column in ACTION_COLUMNS}
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, NamedTuple
+
+from alexlab_if.alexlab_models import AlexlabInterpolation, AlexlabTemplate, DiffStatus
+from alexlab_if.slug_table import SlugTable
+from alexlab_if.utils import parse_rev_date
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# Columns of the candidate actions, the slug being in the format name__cc__lang__arg
+CANDIDATE_COLUMNS = ["slug", "platform", "rev_date", "fingerprint"]
+
+
+class BulkDiff(NamedTuple):
+    """
+    The classification of a table of candidate actions against the existing records.
+
+    Attributes:
+        new (ndarray): Whether each candidate never existed.
+        dup (ndarray): Whether each candidate exists and is unchanged.
+        upd (ndarray): Whether each candidate exists but its content changed.
+        meta (ndarray): Whether each candidate exists and only its revision date changed.
+        existing_ids (ndarray): The id of the existing record with the same slug, -1 for new candidates.
+        outdated_ids (ndarray): The ids of the existing records replaced by the updated candidates.
+    """
+    new: np.ndarray
+    dup: np.ndarray
+    upd: np.ndarray
+    meta: np.ndarray
+    existing_ids: np.ndarray
+    outdated_ids: np.ndarray
+
+    def statuses(self) -> np.ndarray:
+        """
+        Retrieves the diff status of each candidate.
+
+        Returns:
+            ndarray: The DiffStatus of each candidate, as objects.
+        """
+        import numpy as np
+
+        statuses = np.empty(len(self.new), dtype=object)
+        for diff_status in DiffStatus:
+            statuses[getattr(self, diff_status.name)] = diff_status
+        return statuses
+
+
+def template_candidates(template: AlexlabTemplate, interpolations: list[AlexlabInterpolation]) -> pd.DataFrame:
+    """
+    Builds the table of the candidate actions of a template, one row for each interpolation and target platform.
+
+    Args:
+        template (AlexlabTemplate): The template the interpolations come from.
+        interpolations (list[AlexlabInterpolation]): The interpolations of the template.
+
+    Returns:
+        DataFrame: The candidate actions, with the CANDIDATE_COLUMNS, interpolation by interpolation.
+    """
+    import numpy as np
+    import pandas as pd
+
+    platforms = len(template.target_platforms)
+
+    def by_interpolation(values: list) -> np.ndarray:
+        return np.repeat(np.array(values, dtype=object), platforms)
+
+    return pd.DataFrame({
+        "slug": by_interpolation([interpolation.slug for interpolation in interpolations]),
+        "platform": np.tile(
+            np.array([platform.value for platform in template.target_platforms], dtype=object), len(interpolations)
+        ),
+        "rev_date": by_interpolation([interpolation.rev_date for interpolation in interpolations]),
+        "fingerprint": by_interpolation([interpolation.fingerprint for interpolation in interpolations]),
+    }, columns=CANDIDATE_COLUMNS)
+
+
+def bulk_diff(candidates: pd.DataFrame, existing_index: SlugTable) -> BulkDiff:
+    """
+    Classifies candidate actions against the existing records in a single join.
+
+    The candidates are joined with the sorted slug hashes of the existing records, then
+    classified with array comparisons of their revision dates and fingerprints, with the
+    same rules as classify_existing.
+
+    Args:
+        candidates (DataFrame): The candidate actions, with the CANDIDATE_COLUMNS, e.g. of a template or of the whole run.
+        existing_index (SlugTable): The existing records, indexed by slug.
+
+    Returns:
+        BulkDiff: The diff status masks and the ids of the existing records.
+    """
+    import numpy as np
+    import pandas as pd
+
+    rows = existing_index.join(
+        candidates["slug"].to_numpy(dtype=object), candidates["platform"].to_numpy(dtype=object)
+    )
+    found = rows >= 0
+    nothing = np.zeros(len(candidates), dtype=bool)
+    if not found.any():
+        return BulkDiff(
+            ~nothing, nothing, nothing, nothing,
+            np.full(len(candidates), -1, dtype=np.int64), np.empty(0, dtype=np.int64),
+        )
+    found_rows = np.maximum(rows, 0)
+
+    # Revision dates and fingerprints are repeated across platforms, so each distinct one is only converted once
+    rev_date_codes, distinct_rev_dates = pd.factorize(candidates["rev_date"])
+    rev_epochs = np.array(
+        [pd.Timestamp(parse_rev_date(rev_date)).value for rev_date in distinct_rev_dates], dtype=np.int64
+    )[rev_date_codes]
+    # Missing fingerprints are factorized to -1, which picks the trailing NO_FINGERPRINT
+    fingerprint_codes, distinct_fingerprints = pd.factorize(candidates["fingerprint"])
+    fingerprints = np.array(
+        [SlugTable.hash_fingerprint(fingerprint) for fingerprint in distinct_fingerprints] + [SlugTable.NO_FINGERPRINT],
+        dtype=np.uint64,
+    )[fingerprint_codes]
+    has_fingerprints = fingerprint_codes >= 0
+
+    existing_fingerprints = existing_index.fingerprints[found_rows]
+    existing_has_fingerprints = existing_index.has_fingerprints[found_rows]
+    same_rev = existing_index.rev_epochs[found_rows] == rev_epochs
+    # Records without a fingerprint can only be compared by revision date
+    same_content = ~existing_has_fingerprints | (has_fingerprints & (existing_fingerprints == fingerprints))
+
+    dup = found & same_rev & same_content
+    meta = found & ~same_rev & same_content & existing_has_fingerprints
+    upd = found & ~dup & ~meta
+    existing_ids = np.where(found, existing_index.ids[found_rows], -1)
+
+    return BulkDiff(~found, dup, upd, meta, existing_ids, existing_ids[upd])
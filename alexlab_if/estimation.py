@@ -0,0 +1,164 @@
+from collections import Counter
+
+from alexlab_if.alexlab_models import AlexlabInterpolation, AlexlabTemplate, ArgumentIndex, DiffStatus
+from alexlab_if.bulk_diff import CANDIDATE_COLUMNS, bulk_diff
+from alexlab_if.existing_actions import build_slug_index, latest_rev_records, load_existing_actions
+from alexlab_if.template_rendering import country_languages, load_arguments_from_csv, load_templates_from_csv, valid_template_countries
+from alexlab_if.slug_table import SlugTable
+
+
+def estimate_template(
+    template: AlexlabTemplate,
+    variables: ArgumentIndex,
+    existing_slugs: SlugTable,
+    extra_country_languages = [],
+) -> Counter:
+    """
+    Estimates the actions a template would generate without rendering its interpolations.
+
+    Per-country totals are computed from the argument and language cardinalities. The candidate slugs are
+    joined with the existing ones: the candidates which aren't found are NEW, and only those which are
+    found get a fingerprint to be classified as DUP, UPD or META.
+
+    Args:
+        template (AlexlabTemplate): The template to estimate.
+        variables (ArgumentIndex): The variables to use for interpolation, as loaded by load_arguments_from_csv.
+        existing_slugs (SlugTable): The existing records, indexed by slug.
+        extra_country_languages (list, optional): Additional country-language pairs.
+
+    Returns:
+        Counter: The number of actions for each platform and for each diff status.
+    """
+    if len(template.placeholders) == 0:
+        valid_countries = template.target_countries
+        arguments_by_country = {country: [None] for country in template.target_countries}
+    elif len(template.placeholders) == 1:
+        placeholder = template.placeholders[0]
+        if placeholder not in variables:
+            raise ValueError(
+                f"Placeholder {placeholder} was found in the template, but no arguments were provided for it."
+            )
+        valid_countries = valid_template_countries(template, variables, placeholder)
+        arguments_by_country = variables.arguments_by_country(placeholder)
+    else:
+        raise NotImplementedError("Only one placeholder is allowed per template")
+
+    import numpy as np
+    import pandas as pd
+
+    template_tot = 0
+    # The slug, argument and language of each interpolation, a repeated argument being rendered as many times
+    slugs, interpolation_arguments, languages_by_interpolation = [], [], []
+    print(f"\nCountry\tArgs\tLangs\tTotal")
+    for country in valid_countries:
+        arguments = arguments_by_country[country]
+        languages = [
+            language for language in template.target_languages
+            if language in country_languages(country, extra_country_languages)
+        ]
+        country_tot = len(arguments) * len(languages)
+        template_tot += country_tot
+        print(f"{country.value}\t{len(arguments) if arguments != [None] else 0}\t{len(languages)}\t{country_tot}")
+        if country_tot == 0:
+            continue
+
+        language_prefixes = np.array(
+            [AlexlabInterpolation.make_slug(template.name, country, language, [], []) for language in languages], dtype=object
+        )
+        argument_suffixes = np.array(
+            [f"__{argument.slug}" if argument is not None else "" for argument in arguments], dtype=object
+        )
+        # Argument by argument, then language by language, as the interpolations are rendered
+        slugs.append((language_prefixes[np.newaxis, :] + argument_suffixes[:, np.newaxis]).ravel())
+        # Filled in rather than converted, as numpy would iterate the fields of the arguments
+        argument_array = np.empty(len(arguments), dtype=object)
+        argument_array[:] = arguments
+        interpolation_arguments.append(np.repeat(argument_array, len(languages)))
+        languages_by_interpolation.append(np.tile(np.array(languages, dtype=object), len(arguments)))
+
+    print(f"\nTemplate would generate {template_tot} actions for each platform.")
+
+    platforms = np.array([platform.value for platform in template.target_platforms], dtype=object)
+    candidate_count = template_tot * len(platforms)
+    if template_tot == 0 or existing_slugs.records == 0:
+        return Counter({"total": template_tot, DiffStatus.new.name: candidate_count})
+
+    # The candidates are joined by slug first, as only those which already exist need a fingerprint
+    candidate_slugs = np.repeat(np.concatenate(slugs), len(platforms))
+    candidate_platforms = np.tile(platforms, template_tot)
+    found = np.flatnonzero(existing_slugs.join(candidate_slugs, candidate_platforms) >= 0)
+    # Each interpolation found on any platform is fingerprinted once
+    found_interpolations, found_codes = np.unique(found // len(platforms), return_inverse=True)
+
+    found_arguments = np.concatenate(interpolation_arguments)[found_interpolations]
+    found_languages = np.concatenate(languages_by_interpolation)[found_interpolations]
+    fingerprints = np.array([
+        AlexlabInterpolation.make_fingerprint(
+            template.values, template.language, language, [argument.value] if argument is not None else []
+        )
+        for argument, language in zip(found_arguments, found_languages)
+    ], dtype=object)
+    candidates = pd.DataFrame({
+        "slug": candidate_slugs[found],
+        "platform": candidate_platforms[found],
+        "rev_date": template.rev_date,
+        "fingerprint": fingerprints[found_codes],
+    }, columns=CANDIDATE_COLUMNS)
+    diff = bulk_diff(candidates, existing_slugs)
+
+    estimate = Counter({
+        "total": template_tot,
+        **{diff_status.name: int(getattr(diff, diff_status.name).sum()) for diff_status in DiffStatus},
+    })
+    # The candidates which weren't found are new
+    estimate[DiffStatus.new.name] += candidate_count - len(found)
+    return estimate
+def estimate_templates(
+    output_path: str = None,
+    extra_country_languages = [],
+    input_template_path: str = None,
+    input_argument_path: str = None,
+) -> Counter:
+    """
+    Estimates the changes that would be made by running the input files, without materialising the interpolations.
+
+    Args:
+        output_path (str, optional): The path which might contain the existing list of actions.
+        extra_country_languages (list, optional): Additional country-language pairs.
+        input_template_path (str, optional): The path to the input template CSV file.
+        input_argument_path (str, optional): The path to the input argument CSV file.
+
+    Returns:
+        Counter: The total number of actions for each platform and for each diff status.
+    """
+    print(f"Estimate launched")
+
+    templates_to_estimate = load_templates_from_csv(input_template_path)
+    arguments_by_placeholder = load_arguments_from_csv(input_argument_path)
+
+    existing_slugs = build_slug_index(latest_rev_records(load_existing_actions(output_path)))
+    print(f"Found {len(existing_slugs)} existing records")
+
+    estimate = Counter({"total": 0, **{diff_status.name: 0 for diff_status in DiffStatus}})
+    for template in templates_to_estimate:
+        print(
+            f"\n\n\033[1m{template.name}\033[0m now estimating…",
+        )
+        template_estimate = estimate_template(
+            template, arguments_by_placeholder, existing_slugs, extra_country_languages
+        )
+        for label in [DiffStatus.new, DiffStatus.dup, DiffStatus.upd, DiffStatus.meta]:
+            print(f"{label.name.upper()}\t{template_estimate[label.name]}")
+
+        estimate.update(template_estimate)
+
+    print(
+        f"\n{estimate['total']} user actions would be generated by this run for each platform."
+    )
+    print(f"\nTotal {DiffStatus.new.name} actions: {estimate[DiffStatus.new.name]}")
+    print(f"Total {DiffStatus.dup.name} actions: {estimate[DiffStatus.dup.name]}")
+    print(f"Total {DiffStatus.upd.name} actions: {estimate[DiffStatus.upd.name]}")
+    print(f"Total {DiffStatus.meta.name} actions: {estimate[DiffStatus.meta.name]}")
+    print("\n")
+
+    return estimate
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import logging
+import os
+from typing import TYPE_CHECKING
+
+from alexlab_if.ActionDataFrame import ActionDataFrame
+from alexlab_if.alexlab_models import AlexlabAction, AlexlabTemplate, ArgumentIndex, DiffStatus, LanguageEnum, PlatformEnum
+from alexlab_if.slug_table import SlugTable
+from alexlab_if.utils import parse_rev_date
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger()
+
+
+def load_existing_actions(output_path: str) -> pd.DataFrame:
+    """
+    Loads the existing list of actions, if any.
+
+    Args:
+        output_path (str): The path to the CSV file which might contain the existing actions.
+
+    Returns:
+        DataFrame: The existing actions, or an empty ActionDataFrame if the file doesn't exist.
+    """
+    import pandas as pd
+
+    try:
+        return pd.read_csv(output_path)
+    except FileNotFoundError:
+        return ActionDataFrame()
+
+
+def save_actions(output_df: pd.DataFrame, output_path: str):
+    """
+    Saves the list of actions, replacing the previous file only once the new one is fully written.
+
+    Args:
+        output_df (DataFrame): The actions to save.
+        output_path (str): The path to the CSV file.
+    """
+    temporary_path = f"{output_path}.tmp"
+    output_df.to_csv(temporary_path, index=False)
+    os.replace(temporary_path, output_path)
+
+
+def apply_actions(output_df: pd.DataFrame, actions: list[AlexlabAction]) -> pd.DataFrame:
+    """
+    Applies a list of actions to the existing ones: new and updated actions are appended, the records they
+    update are marked as outdated and the records of metadata-only actions get their new revision date.
+
+    The existing actions are left untouched, so that they are still consistent if the updated list can't be saved.
+
+    Args:
+        output_df (DataFrame): The existing actions.
+        actions (list[AlexlabAction]): The actions to apply.
+
+    Returns:
+        DataFrame: The updated list of actions, whose ids are their positions.
+    """
+    import pandas as pd
+
+    outdated_record_ids = [
+        action.existing_record_id for action in actions if action.diff_status == DiffStatus.upd
+    ]
+
+    new_records_df = pd.DataFrame([
+        action.to_record() for action in actions
+        if action.diff_status in (DiffStatus.new, DiffStatus.upd)
+    ])
+    # A new frame, in which the existing records keep their positions
+    updated_df = pd.concat([output_df, new_records_df], ignore_index=True)
+
+    # Marks every row in the df where record_id is in outdated_record_ids
+    outdated_positions = output_df.index.get_indexer(outdated_record_ids)
+    updated_df.iloc[outdated_positions[outdated_positions >= 0], updated_df.columns.get_loc('is_latest_rev')] = False
+
+    # Bumps the revision date of the records whose content didn't change
+    meta_actions = [action for action in actions if action.diff_status == DiffStatus.meta]
+    meta_columns = updated_df.columns.get_indexer(['rev_date', 'experiment_slug'])
+    for position, action in zip(output_df.index.get_indexer([action.existing_record_id for action in meta_actions]), meta_actions):
+        if position >= 0:
+            updated_df.iloc[position, meta_columns] = [action.rev_date, action.experiment_slug]
+
+    return updated_df
+
+
+def written_records(output_df: pd.DataFrame, actions: list[AlexlabAction], previous_length: int) -> pd.DataFrame:
+    """
+    Retrieves the latest revision records written or modified by apply_actions, to add them to a slug index.
+
+    Args:
+        output_df (DataFrame): The actions, as returned by apply_actions.
+        actions (list[AlexlabAction]): The applied actions.
+        previous_length (int): The number of actions before they were applied.
+
+    Returns:
+        DataFrame: The records of the metadata-only actions, then the appended records.
+    """
+    import pandas as pd
+
+    meta_record_ids = [action.existing_record_id for action in actions if action.diff_status == DiffStatus.meta]
+    return pd.concat([output_df.loc[meta_record_ids], output_df.iloc[previous_length:]])
+
+
+def latest_rev_records(output_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Filters the actions down to their latest revision.
+
+    Args:
+        output_df (DataFrame): The existing actions.
+
+    Returns:
+        DataFrame: The actions whose is_latest_rev flag is set.
+    """
+    if output_df.empty:
+        return ActionDataFrame()
+    return output_df[output_df["is_latest_rev"] == True]
+
+
+def build_slug_index(existing_action_records: pd.DataFrame) -> SlugTable:
+    """
+    Indexes the latest revision records by slug in the format name__cc__lang__arg__platform.
+
+    Args:
+        existing_action_records (DataFrame): The latest revision records.
+
+    Returns:
+        SlugTable: A compact mapping from each slug to the record id, revision date and content fingerprint.
+    """
+    return SlugTable(existing_action_records)
+
+
+def classify_existing(existing_record: dict, rev_date: str, fingerprint: str) -> DiffStatus:
+    """
+    Classifies a candidate action against the existing record with the same slug.
+
+    Args:
+        existing_record (dict): The existing record, as found in the slug index.
+        rev_date (str): The revision date of the candidate.
+        fingerprint (str): The content fingerprint of the candidate.
+
+    Returns:
+        DiffStatus: dup if nothing changed, meta if only the revision date changed, upd otherwise.
+    """
+    same_rev = parse_rev_date(existing_record["rev_date"]) == parse_rev_date(rev_date)
+
+    # Records without a fingerprint can only be compared by revision date
+    if existing_record["fingerprint"] is None:
+        return DiffStatus.dup if same_rev else DiffStatus.upd
+
+    if existing_record["fingerprint"] != fingerprint:
+        return DiffStatus.upd
+    return DiffStatus.dup if same_rev else DiffStatus.meta
+
+
+def discarded_arguments(template: AlexlabTemplate, arguments_by_placeholder: ArgumentIndex) -> set[str]:
+    """
+    Identifies the discarded arguments of a template, whose existing records are kept as they are.
+
+    Args:
+        template (AlexlabTemplate): The template.
+        arguments_by_placeholder (ArgumentIndex): The arguments by placeholder.
+
+    Returns:
+        set: The values of the discarded arguments.
+    """
+    # TODO: just like interpolate_template_and_arguments() this only supports max 1 placeholder 
+    if len(template.placeholders) != 1:
+        return set()
+
+    placeholder = template.placeholders[0]
+    if placeholder not in arguments_by_placeholder:
+        raise ValueError(f"Found no arguments for placeholder '{placeholder}'")
+
+    template_discarded_arguments = {
+        argument.value
+        for argument in arguments_by_placeholder[placeholder].arguments
+        if argument.status == 'discarded'
+    }
+    if template_discarded_arguments:
+        logger.debug(f"Discarded arguments for {template.name}: {template_discarded_arguments}")
+    return template_discarded_arguments
+
+
+def translation_cache_entries(existing_action_records: pd.DataFrame) -> list[tuple[str, LanguageEnum, LanguageEnum, str]]:
+    """
+    Recovers the translations stored in the latest revision records of non-search platforms,
+    whose values are the full translated text rather than a search query.
+
+    The records composed from a translated skeleton and argument are left out, as they aren't
+    translations of their full source text.
+
+    Args:
+        existing_action_records (DataFrame): The latest revision records.
+
+    Returns:
+        list: (text, source_lang, target_lang, translation) tuples.
+    """
+    # Files written before source texts were introduced have no such column
+    if "source_text" not in existing_action_records:
+        return []
+
+    non_search_platforms = [platform.value for platform in PlatformEnum if not platform.is_search_engine]
+    translated_records = existing_action_records[
+        existing_action_records["platform"].isin(non_search_platforms)
+        & existing_action_records["source_text"].notna()
+        & (existing_action_records["language"] != existing_action_records["source_language"])
+    ]
+    # Files written before translation strategies were recorded only have full translations
+    if "translation_strategy" in translated_records:
+        translated_records = translated_records[translated_records["translation_strategy"] != "skeleton"]
+    return [
+        (source_text, LanguageEnum(source_language), LanguageEnum(language), values)
+        for source_text, source_language, language, values in zip(
+            translated_records["source_text"],
+            translated_records["source_language"],
+            translated_records["language"],
+            translated_records["values"],
+        )
+    ]
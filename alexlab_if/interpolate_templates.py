@@ -1,23 +1,19 @@
 import logging
-from alexlab_if.ActionDataFrame import ActionDataFrame
-from alexlab_if.alexlab_models import AlexlabInterpolation, DiffStatus, PlaceholderArgument
-from alexlab_if.keyword_extraction import prompt_to_search_query
-from alexlab_if.template_rendering import PromptCounter, interpolate_template_and_arguments, load_arguments_from_csv, load_templates_from_csv
+from alexlab_if.action_stream import diff_interpolations, print_diff_report
+from alexlab_if.alexlab_models import DiffStatus
+from alexlab_if.existing_actions import apply_actions, build_slug_index, discarded_arguments, latest_rev_records, load_existing_actions, save_actions, translation_cache_entries
+from alexlab_if.keyword_extraction import load_stopwords
+from alexlab_if.pipeline import TemplateStages, UnitBatch, UnitStart, run_pipeline
+from alexlab_if.run_journal import RunJournal
+from alexlab_if.scheduling import RunBudget, has_remainder_phase, prioritize_templates, print_deferred_report
+from alexlab_if.template_rendering import PromptCounter, country_languages, interpolate_template_and_arguments, load_arguments_from_csv, load_templates_from_csv
 from alexlab_if.translation import TranslationService
-from alexlab_if.utils import shorten, trailing_platform_slug
-
-from dateutil import tz
-
-import pandas as pd
-from dateutil.parser import parse as parsedate
-from tqdm import tqdm
+from alexlab_if.utils import trailing_platform_slug
 
 from collections import Counter
 
 logger = logging.getLogger()
 
-UTC = tz.gettz("UTC")
-
 def interpolate_templates(
     output_path: str = None,
     should_translate: bool = True,
@@ -26,6 +22,12 @@ def interpolate_templates(
     input_argument_path: str = None,
     dry_run: bool = True,
     translation_service: TranslationService = None,
+    warm_translation_cache: bool = True,
+    resume: bool = False,
+    translation_strategy: str = "full",
+    deadline: float = None,
+    translation_budget: int = None,
+    pipeline_queue_size: int = 2,
 ):
     """
     Interpolates templates with arguments and generates user actions.
@@ -37,20 +39,34 @@ def interpolate_templates(
         input_template_path (str, optional): The path to the input template CSV file.
         input_argument_path (str, optional): The path to the input argument CSV file.
         dry_run (bool, optional): Whether to perform a dry run without saving the output.
+        translation_service (TranslationService, optional): The service to use for translations.
+        warm_translation_cache (bool, optional): Whether to reuse the translations found in the existing list of actions.
+        resume (bool, optional): Whether to skip the work units completed by a previous run, as recorded in its journal.
+        translation_strategy (str, optional): Either "full" to translate whole interpolations, or "skeleton" to translate the templates and the arguments separately.
+        deadline (float, optional): The number of seconds after which the remaining interpolations are deferred.
+        translation_budget (int, optional): The number of remote translations after which the remaining interpolations are deferred.
+        pipeline_queue_size (int, optional): The number of units or batches which can wait between two stages of the pipeline.
+
+    Templates are processed by priority: the first min_samples interpolations of every template are
+    generated before the remainder of any template, so that a run reaching its deadline or translation
+    budget still covers all the templates, the most urgent first. The deferred interpolations are
+    reported, and left to a resumed run.
+
+    The templates are rendered and diffed, translated, and turned into actions by concurrent stages,
+    each getting ahead of the next by at most pipeline_queue_size units or batches, while the actions
+    are written and journaled in the order of the schedule.
     """
+    from tqdm import tqdm
 
     ts = translation_service
 
     if dry_run:
         print(f"Dry run launched")
 
-    templates_to_import = load_templates_from_csv(input_template_path)
+    templates_to_import = prioritize_templates(load_templates_from_csv(input_template_path))
     arguments_by_placeholder = load_arguments_from_csv(input_argument_path)
 
-    try :
-        output_df = pd.read_csv(output_path)
-    except FileNotFoundError:
-        output_df = ActionDataFrame()
+    output_df = load_existing_actions(output_path)
 
     if output_df.empty:
         print("No existing file found")
@@ -58,240 +74,180 @@ def interpolate_templates(
     else:
         print("Existing file found")
 
-    existing_action_records = output_df[output_df["is_latest_rev"] == True] if not output_df.empty else ActionDataFrame()
+    existing_action_records = latest_rev_records(output_df)
 
     # get slugs in the format name__cc__lang__platform
-    existing_slugs = {
-        trailing_platform_slug(record["slug"], record["platform"]): {
-            "id": index,
-            "rev_date": record["rev_date"],
-        }
-        for index, record in existing_action_records.iterrows()
-    }
+    existing_slugs = build_slug_index(existing_action_records)
 
     print(f"Found {len(existing_slugs)} existing records")
 
+    if warm_translation_cache and should_translate and ts and not dry_run:
+        warmed = ts.warm_cache(translation_cache_entries(existing_action_records))
+        print(f"Warmed translation cache with {warmed} existing translations")
+
+    if should_translate and ts and len(ts.endpoints) > 1 and not dry_run:
+        ts.check_health()
+
+    completed_templates = set()
+    journal = None
+    if not dry_run:
+        journal = RunJournal(RunJournal.path_for(output_path))
+        if resume:
+            journaled_translations, completed_templates = journal.load()
+            if ts:
+                ts.warm_cache(journaled_translations)
+            print(
+                f"Resuming from {journal.path}: {len(journaled_translations)} translations and {len(completed_templates)} templates already completed"
+            )
+        journal.open(resume=resume)
+
     counter = PromptCounter()
-    diff_counter = Counter({DiffStatus.new.name:0, DiffStatus.dup.name:0, DiffStatus.upd.name: 0})
+    diff_counter = Counter({DiffStatus.new.name:0, DiffStatus.dup.name:0, DiffStatus.upd.name: 0, DiffStatus.meta.name: 0})
     outdated_arguments = set([])
 
+    if dry_run:
+        for template in templates_to_import:
+            print(f"\n\n\033[1m{template.name}\033[0m now processing…")
 
-    for template in tqdm(templates_to_import,
-        desc="Rendering template",
-        total=len(templates_to_import),
-        disable=dry_run,
-    ):
-        try:
-
-            print(
-                f"\n\n\033[1m{template.name}\033[0m now processing…",
-            )
+            outdated_arguments.update(discarded_arguments(template, arguments_by_placeholder))
 
             interpolations = interpolate_template_and_arguments(
                 template=template,
-                variables=arguments_by_placeholder.values(),
+                variables=arguments_by_placeholder,
                 counter=counter,
                 extra_country_languages=extra_country_languages
             )
 
-            relevant_interpolations = []
-
-            outdated_record_ids = []
-
             print("\nChanges")
+            for interpolation, platform_diffs in diff_interpolations(template, interpolations, existing_slugs):
+                print_diff_report(interpolation, platform_diffs)
+                diff_counter.update(diff_status.name for _, diff_status, _ in platform_diffs)
 
-            for interpolation in interpolations:
-
-                target_platforms = []
-
-                # For reporting only
-                new = []
-                dup = []
-                upd = []
-
-                interpolation_rev = parsedate(interpolation.rev_date)
-                interpolation_rev = interpolation_rev.replace(tzinfo=UTC)
-
-
-                for platform in template.target_platforms:
-
-                    # get slug in the format name__cc__lang__platform
-                    candidate_slug = trailing_platform_slug(
-                        interpolation.slug, platform
-                    )
-
-                    slug_already_exists = candidate_slug in existing_slugs
-
-                    # Case 1: never existed
-                    if not slug_already_exists:
-                        new.append(platform.value)
-                        target_platforms.append(platform)
-                    else:
-                        # Case 2: exists and is the same (template string is the same, argument slug is the same)
-
-                        candidate_rev = parsedate(existing_slugs[candidate_slug]["rev_date"])
-                        candidate_rev = candidate_rev.replace(tzinfo=UTC)
+            print(
+                "-------------------------------------------------------------------------"
+            )
 
-                        # TODO: look in the database to also resume when half-done with new source files
-                        if slug_already_exists and (interpolation_rev == candidate_rev):
-                            dup.append(platform.value)
-                            pass
+        print(
+            f"\n{counter.value} user actions would be generated by this run for each platform."
+        )
 
-                        # Case 3: exists but got an update
-                        # TODO: look in the database to also resume when half-done with new source files
-                        elif slug_already_exists and  (interpolation_rev != candidate_rev):
-                            upd.append(platform.value)
-                            outdated_record_ids.append(existing_slugs[candidate_slug]["id"])
+        print(f"\nTotal {DiffStatus.new.name} actions: {diff_counter[DiffStatus.new.name]}")
+        print(f"Total {DiffStatus.dup.name} actions: {diff_counter[DiffStatus.dup.name]}")
+        print(f"Total {DiffStatus.upd.name} actions: {diff_counter[DiffStatus.upd.name]}")
+        print(f"Total {DiffStatus.meta.name} actions: {diff_counter[DiffStatus.meta.name]}")
 
-                            target_platforms.append(platform)
 
-                # Interpolation report
-                prefix = f"{interpolation.country.value} {interpolation.language.value} {' '.join(interpolation.arguments)}"
-                for label, lst in [("NEW", new), ("DUP", dup), ("UPD", upd)]:
-                    if len(lst) > 0:
-                        print(
-                            f"{label} {prefix}:\t{','.join (map(shorten, lst))}",
-                        )
+        print(f'\nOutdated arguments: {"; ".join(outdated_arguments)}.')
+        print("\n")
+        return
+
+    budget = RunBudget(deadline, translation_budget, ts if should_translate else None)
+    # The samples of every template, then the remainder of the templates which have one
+    schedule = [(template, True) for template in templates_to_import]
+    schedule += [(template, False) for template in templates_to_import if has_remainder_phase(template, budget)]
+
+    # Search queries are generated in a thread of the pipeline, which can't ask to continue without stopwords
+    load_stopwords({
+        language
+        for template in templates_to_import
+        if RunJournal.template_key(template) not in completed_templates
+        and any(platform.is_search_engine for platform in template.target_platforms)
+        for country in template.target_countries
+        for language in template.target_languages if language in country_languages(country, extra_country_languages)
+    })
+
+    with tqdm(desc="\ttranslating", leave=False) as translation_progress:
+        def on_translated(text, source_lang, target_lang, translation):
+            journal.record_translation(text, source_lang, target_lang, translation)
+            translation_progress.update()
+
+        stages = TemplateStages(
+            arguments=arguments_by_placeholder,
+            existing_index=existing_slugs,
+            completed_templates=completed_templates,
+            budget=budget,
+            extra_country_languages=extra_country_languages,
+            translation_service=ts,
+            should_translate=should_translate,
+            translation_strategy=translation_strategy,
+            counter=counter,
+            on_translated=on_translated,
+        )
 
-                if len(target_platforms) > 0:
-                    interpolation.target_platforms = target_platforms
-
-                    relevant_interpolations.append(interpolation)
-
-                diff_counter.update({
-                    DiffStatus.new.name: len(new),
-                    DiffStatus.dup.name: len(dup),
-                    DiffStatus.upd.name: len(upd)
-                })
-
-            # Template report
-            logger.debug(f"Outdated records for {template.name}: {outdated_record_ids}")
-
-            # TODO: just like interpolate_template_and_arguments() this only supports max 1 placeholder 
-            if len(template.placeholders) == 1:
-                # Identify outdated arguments
-                placeholder = template.placeholders[0]
-
-                if placeholder in arguments_by_placeholder:
-
-                    template_outdated_arguments: list[PlaceholderArgument] = [
-                        argument
-                        for argument in arguments_by_placeholder[placeholder].arguments
-                        if argument.status == 'discarded'
-                    ]
-
-                    outdated_arguments.update([argument.value for argument in template_outdated_arguments])
-
-                    template_outdated_argument_slugs = []
-                    if len(template_outdated_argument_slugs) > 0:
-
-                        print(f"Outdated arguments for template: {template_outdated_argument_slugs}")
-
-                        for slug in existing_slugs:
-                            slug_parts = slug.split("__")
-
-                            if slug_parts[0] != AlexlabInterpolation.sluggify(
-                                template.name
-                            ):
-                                continue
-
-                            for argument in template_outdated_arguments:
-                                for country in argument.countries:
-                                    for lang in country.to_languages():
-                                        # Early fail
-                                        if (
-                                            slug_parts[3]
-                                            == AlexlabInterpolation.sluggify(argument.value)
-                                            and slug_parts[2] == lang.value
-                                            and slug_parts[1] == country.value
-                                        ):
-                                            template_outdated_argument_slugs.append(slug)
-                                            outdated_record_ids.append(
-                                                existing_slugs[slug]["id"]
-                                            )
-
-                        print(f"Outdated argument slugs: {template_outdated_argument_slugs}")
-                else:
-                    raise ValueError(f"Found no arguments for placeholder '{placeholder}'")
-
-            if dry_run:
-                print(
-                    "-------------------------------------------------------------------------"
-                )
-                continue
-
-            translated_interpolations = []
-            if should_translate:
-                for interpolation in tqdm(
-                    relevant_interpolations, desc="\ttranslating", leave=False
+        # Rendering, translation and action generation run concurrently, while the actions are
+        # written in the order of the schedule, so that the output is the same as one template at a time
+        try:
+            with tqdm(desc="Rendering template", total=len(schedule)) as progress:
+                actions = []
+                for item in run_pipeline(
+                    schedule,
+                    [stages.render, stages.translate, stages.generate_actions],
+                    queue_size=pipeline_queue_size,
                 ):
-                    if not interpolation.is_translated:
-                        if not translation_service:
-                            raise ValueError("Translation service is required for translation.")
+                    template = item.unit.template
+
+                    if isinstance(item, UnitStart):
                         print(
-                            f"Translating {interpolation.slug}",
-                        )
-                        translation = ts.translate(
-                            text=interpolation.text,
-                            source_lang=interpolation.template.language,
-                            target_lang=interpolation.language,
+                            f"\n\n\033[1m{template.name}\033[0m now processing…\n\nChanges"
+                            if item.unit.is_sample_phase else
+                            f"\n\n\033[1m{template.name}\033[0m now filling in the remainder…",
                         )
-                        interpolation.text = translation
-                        interpolation.is_translated = True
-
-                    translated_interpolations.append(interpolation)
-            else:
-                translated_interpolations = relevant_interpolations
-
-            # Marks every row in the df where record_id is in outdated_record_ids
-            output_df.loc[output_df.index.isin(outdated_record_ids), 'is_latest_rev'] = False
-
-            new_records = []
-            for interpolation in translated_interpolations:
-                for platform in interpolation.target_platforms:
+                        actions = []
+
+                    elif isinstance(item, UnitBatch):
+                        for interpolation, platform_diffs in item.diffs:
+                            print_diff_report(interpolation, platform_diffs)
+                        for action in item.actions:
+                            if action.diff_status in (DiffStatus.new, DiffStatus.upd):
+                                print(
+                                    f"Adding {trailing_platform_slug(action.slug, action.platform)}",
+                                )
+                        actions += item.actions
+
+                    elif item.unit.skipped:
+                        if item.unit.is_sample_phase:
+                            print(f"\n\n\033[1m{template.name}\033[0m already completed, skipping")
+                        progress.update()
 
-                    values = (
-                        prompt_to_search_query(
-                            interpolation.text, interpolation.language
-                        )
-                        if platform.is_search_engine
-                        else interpolation.text
-                    )
-                    print(
-                        f"Adding {trailing_platform_slug(interpolation.slug, platform)}",
-                    )
-                    new_records.append(
-                        dict(
-                            country=interpolation.country.value,
-                            language=interpolation.language.value,
-                            platform=platform,
-                            values=values,
-                            rev_date=interpolation.rev_date,
-                            slug=interpolation.slug,
-                            experiment_slug=interpolation.experiment_slug,
-                            is_latest_rev=True,
-                        )
-                    )
+                    else:
+                        if actions:
+                            output_df = apply_actions(output_df, actions)
+                            save_actions(output_df, output_path)
+                        actions = []
 
-            new_records_df = pd.DataFrame(new_records)
-            output_df = pd.concat([output_df, new_records_df], ignore_index=True)
-            output_df.to_csv(output_path, index=False)
+                        if item.completed:
+                            completed_templates.add(RunJournal.template_key(template))
+                            journal.record_template(template)
+                        progress.update()
 
         except Exception as e:
             logger.error(f"ERROR: {e}")
+            journal.close()
+            print(f"Completed work was saved in {journal.path}, run again with --resume to continue")
             raise e
 
-    if dry_run:
-        print(
-            f"\n{counter.value} user actions would be generated by this run for each platform."
+    remainders = stages.remainders
+
+    if stages.outdated_arguments:
+        print(f'\nOutdated arguments: {"; ".join(stages.outdated_arguments)}.')
+
+    if should_translate and ts and len(ts.endpoints) > 1:
+        ts.report()
+    if should_translate and ts and ts.memory is not None:
+        ts.memory.report()
+
+    if remainders:
+        journal.close()
+        print_deferred_report(
+            {
+                template.name: (template.priority, remainders[RunJournal.template_key(template)])
+                for template in templates_to_import
+                if RunJournal.template_key(template) in remainders
+            },
+            budget.exhausted_reason(),
         )
+        print(f"\nPartially updated {output_path}, run again with --resume to fill in the deferred interpolations.")
+        return
 
-        print(f"\nTotal {DiffStatus.new.name} actions: {diff_counter[DiffStatus.new.name]}")
-        print(f"Total {DiffStatus.dup.name} actions: {diff_counter[DiffStatus.dup.name]}")
-        print(f"Total {DiffStatus.upd.name} actions: {diff_counter[DiffStatus.upd.name]}")
-
-
-        print(f'\nOutdated arguments: {"; ".join(outdated_arguments)}.')
-        print("\n")
-    else:
-        print(f"Successfully updated {output_path}.")
\ No newline at end of file
+    journal.remove()
+    print(f"Successfully updated {output_path}.")
@@ -3,8 +3,6 @@ from functools import lru_cache
 from importlib import resources
 import logging
 
-import yake
-
 from alexlab_if.alexlab_models import LanguageEnum
 logger = logging.getLogger()
 
@@ -26,6 +24,8 @@ def extract_keywords(text: str, language: LanguageEnum):
     window_size = 1
     num_of_keywords = 5
 
+    import yake
+
     kw_extractor = yake.KeywordExtractor(
         lan=language.value,
         n=max_ngram_size,
@@ -53,6 +53,18 @@ def prompt_to_search_query(text: str, language: LanguageEnum):
     return _remove_stopwords(_remove_punctuation(text), language)
 
 
+def load_stopwords(languages):
+    """
+    Loads the stopwords of the given languages ahead of the search queries, so that a missing stopword
+    file is confirmed before any of them is generated.
+
+    Args:
+        languages (Iterable[LanguageEnum]): The languages of the search queries.
+    """
+    for language in languages:
+        _get_stopwords(language)
+
+
 @lru_cache
 def _get_stopwords(language: LanguageEnum) -> set[str]:
     """
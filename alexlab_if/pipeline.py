@@ -0,0 +1,258 @@
+import logging
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional
+
+from alexlab_if.action_stream import diff_interpolations, interpolation_actions, translate_interpolations
+from alexlab_if.alexlab_models import AlexlabAction, AlexlabTemplate, ArgumentIndex
+from alexlab_if.existing_actions import discarded_arguments
+from alexlab_if.run_journal import RunJournal
+from alexlab_if.scheduling import Diff, RunBudget, has_remainder_phase, split_samples
+from alexlab_if.slug_table import SlugTable
+from alexlab_if.template_rendering import PromptCounter, interpolate_template_and_arguments
+from alexlab_if.translation import TranslationService
+
+logger = logging.getLogger()
+
+# Marks the end of the items of a stage
+_DONE = object()
+
+
+class _StageError(NamedTuple):
+    error: BaseException
+
+
+def run_pipeline(
+    items: Iterable,
+    stages: list[Callable[[Any], Iterable]],
+    queue_size: int = 2,
+) -> Iterator:
+    """
+    Runs stages concurrently over a stream of items, each stage in its own thread.
+
+    The stages are connected by bounded queues: a stage which gets ahead of the next one blocks
+    once the queue between them is full (backpressure), so that at most queue_size items are
+    waiting between two stages. Each stage handles its items one at a time, in the order it
+    receives them, so the items come out of the pipeline in a deterministic order.
+
+    Args:
+        items (Iterable): The items of the first stage, iterated in its thread.
+        stages (list[Callable]): The stages, each mapping an item to any number of items of the next stage.
+        queue_size (int, optional): The number of items which can wait between two stages.
+
+    Yields:
+        The items of the last stage, in the calling thread.
+
+    Raises:
+        ValueError: If queue_size is less than 1.
+        BaseException: The first exception raised by a stage, once the other stages have stopped.
+    """
+    if queue_size < 1:
+        # A queue of size 0 would be unbounded
+        raise ValueError(f"The queue size must be at least 1, got {queue_size}")
+
+    stop = threading.Event()
+    outputs = [queue.Queue(maxsize=queue_size) for _ in stages]
+
+    # Timeouts let the stages notice that the pipeline was stopped while they wait
+    def put(output: queue.Queue, item) -> bool:
+        while not stop.is_set():
+            try:
+                output.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(input: queue.Queue, producer: threading.Thread):
+        while not stop.is_set():
+            try:
+                return input.get(timeout=0.1)
+            except queue.Empty:
+                # A stage always ends its items with _DONE or an error, unless its thread was killed
+                if not producer.is_alive() and input.empty():
+                    return _StageError(RuntimeError(f"{producer.name} stopped unexpectedly"))
+        return _DONE
+
+    def run_stage(index: int, stage: Callable[[Any], Iterable]):
+        inputs = iter(items) if index == 0 else iter(lambda: get(outputs[index - 1], threads[index - 1]), _DONE)
+        try:
+            for item in inputs:
+                if isinstance(item, _StageError):
+                    put(outputs[index], item)
+                    return
+                for result in stage(item):
+                    if not put(outputs[index], result):
+                        return
+        except BaseException as e:
+            # Including SystemExit and KeyboardInterrupt, which are raised again in the calling thread
+            put(outputs[index], _StageError(e))
+            return
+        put(outputs[index], _DONE)
+
+    threads = [
+        threading.Thread(target=run_stage, args=(index, stage), name=f"pipeline-stage-{index}", daemon=True)
+        for index, stage in enumerate(stages)
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        while (item := get(outputs[-1], threads[-1])) is not _DONE:
+            if isinstance(item, _StageError):
+                raise item.error
+            yield item
+    finally:
+        # Also reached when the consumer fails or stops early
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+class TemplateUnit(NamedTuple):
+    """
+    One entry of the schedule of a run: the samples or the remainder of a template.
+    """
+    template: AlexlabTemplate
+    is_sample_phase: bool
+    skipped: bool = False
+    samples: Optional[list[Diff]] = None
+    remainder: Optional[list[Diff]] = None
+
+
+class UnitStart(NamedTuple):
+    unit: TemplateUnit
+
+
+class UnitBatch(NamedTuple):
+    """
+    A batch of classified interpolations of a unit, translated, then turned into actions.
+    """
+    unit: TemplateUnit
+    diffs: list[Diff]
+    actions: Optional[list[AlexlabAction]] = None
+
+
+class UnitEnd(NamedTuple):
+    """
+    The end of a unit, completed says whether the template has no interpolation left to generate.
+    """
+    unit: TemplateUnit
+    completed: bool = False
+
+
+class TemplateStages:
+    """
+    The stages of a run, from the schedule of templates to the batches of actions to write:
+
+        render: renders and diffs the templates, and splits their samples from their remainder.
+        translate: translates the interpolations in batches, while the run budget allows.
+        generate_actions: turns the translated interpolations into actions, with search queries.
+
+    For each unit it processes, the translate stage yields a UnitStart, the UnitBatch items and a UnitEnd,
+    and for each unit it skips, a single UnitEnd. The number of interpolations left when the budget is
+    exhausted is kept in remainders by template key, and the remainder is rendered again by its second pass.
+    """
+
+    def __init__(
+        self,
+        arguments: ArgumentIndex,
+        existing_index: SlugTable,
+        completed_templates: set[str],
+        budget: RunBudget,
+        extra_country_languages = [],
+        translation_service: TranslationService = None,
+        should_translate: bool = True,
+        translation_strategy: str = "full",
+        counter: PromptCounter = None,
+        on_translated: Callable = None,
+    ):
+        self.arguments = arguments
+        self.existing_index = existing_index
+        # Only the templates completed by a previous run, the others are completed as the run goes
+        self.completed_templates = frozenset(completed_templates)
+        self.budget = budget
+        self.extra_country_languages = extra_country_languages
+        self.translation_service = translation_service
+        self.should_translate = should_translate
+        self.translation_strategy = translation_strategy
+        self.counter = counter
+        self.on_translated = on_translated
+        self.remainders: dict[str, int] = {}
+        self.outdated_arguments: set[str] = set()
+
+    def _render(self, template: AlexlabTemplate, counter: PromptCounter = None) -> list[Diff]:
+        # The template report is left to the dry run, as it would interleave with the other stages
+        interpolations = interpolate_template_and_arguments(
+            template=template,
+            variables=self.arguments,
+            counter=counter,
+            extra_country_languages=self.extra_country_languages,
+            report=False,
+        )
+        return diff_interpolations(template, interpolations, self.existing_index)
+
+    def render(self, entry: tuple[AlexlabTemplate, bool]) -> Iterator[TemplateUnit]:
+        template, is_sample_phase = entry
+        if RunJournal.template_key(template) in self.completed_templates:
+            yield TemplateUnit(template, is_sample_phase, skipped=True)
+            return
+        if not is_sample_phase:
+            # The remainder is only known once the samples have been translated
+            yield TemplateUnit(template, is_sample_phase)
+            return
+
+        self.outdated_arguments.update(discarded_arguments(template, self.arguments))
+
+        diffs = self._render(template, self.counter)
+        if has_remainder_phase(template, self.budget):
+            samples, remainder = split_samples(diffs, template.min_samples)
+        else:
+            samples, remainder = diffs, []
+        yield TemplateUnit(template, is_sample_phase, False, samples, remainder)
+
+    def translate(self, unit: TemplateUnit) -> Iterator[Any]:
+        if unit.skipped:
+            yield UnitEnd(unit)
+            return
+
+        template_key = RunJournal.template_key(unit.template)
+        if unit.is_sample_phase:
+            work = unit.samples + unit.remainder
+            total = len(unit.samples)
+        else:
+            if template_key not in self.remainders or self.budget.exhausted_reason():
+                yield UnitEnd(unit)
+                return
+            # Rendering again is cheaper than keeping the remainder of every template until the second pass
+            samples, remainder = split_samples(self._render(unit.template), unit.template.min_samples)
+            work = (samples + remainder)[-self.remainders.pop(template_key):]
+            total = len(work)
+
+        yield UnitStart(unit)
+        done = 0
+        while done < total and not self.budget.exhausted_reason():
+            batch = work[done:min(total, done + self.budget.batch_size(100))]
+            if self.should_translate:
+                translate_interpolations(
+                    [interpolation for interpolation, _ in batch if interpolation.target_platforms],
+                    self.translation_service,
+                    self.on_translated,
+                    self.translation_strategy,
+                )
+            yield UnitBatch(unit, batch)
+            done += len(batch)
+
+        left = len(work) - done
+        if left:
+            self.remainders[template_key] = left
+        yield UnitEnd(unit, completed=not left)
+
+    def generate_actions(self, item: Any) -> Iterator[Any]:
+        if isinstance(item, UnitBatch):
+            item = item._replace(actions=[
+                action
+                for interpolation, platform_diffs in item.diffs
+                for action in interpolation_actions(interpolation, platform_diffs)
+            ])
+        yield item
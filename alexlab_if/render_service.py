@@ -0,0 +1,210 @@
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from alexlab_if.action_stream import iter_actions
+from alexlab_if.alexlab_models import AlexlabAction, AlexlabTemplate
+from alexlab_if.existing_actions import apply_actions, build_slug_index, latest_rev_records, load_existing_actions, save_actions, translation_cache_entries, written_records
+from alexlab_if.template_rendering import load_arguments_from_csv, template_from_row
+from alexlab_if.translation import TranslationService
+
+logger = logging.getLogger()
+
+
+class RenderService:
+    """
+    Renders, diffs and translates submitted templates on demand, with the arguments, the index of the
+    existing actions and the translation service kept in memory between requests.
+
+    Requests which only render are served concurrently, while requests which write their actions to the
+    output file are serialized, from the diff to the update of the index, so that they can't both add
+    the same action nor overwrite each other's changes.
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        input_argument_path: str,
+        translation_service: TranslationService = None,
+        extra_country_languages = [],
+        warm_translation_cache: bool = True,
+        translation_strategy: str = "full",
+    ):
+        """
+        Args:
+            output_path (str): The path which might contain the existing list of actions and where to save the updated list as a CSV file.
+            input_argument_path (str): The path to the input argument CSV file.
+            translation_service (TranslationService, optional): The service to use for translations.
+            extra_country_languages (list, optional): Additional country-language pairs.
+            warm_translation_cache (bool, optional): Whether to reuse the translations found in the existing list of actions.
+            translation_strategy (str, optional): Either "full" or "skeleton", see translate_interpolations.
+        """
+        self.output_path = output_path
+        self.translation_service = translation_service
+        self.extra_country_languages = extra_country_languages
+        self.translation_strategy = translation_strategy
+        self.arguments = load_arguments_from_csv(input_argument_path)
+
+        self.output_df = load_existing_actions(output_path)
+        existing_action_records = latest_rev_records(self.output_df)
+        # Replaced rather than modified, so that concurrent renders keep a consistent index
+        self.existing_slugs = build_slug_index(existing_action_records)
+        print(f"Found {len(self.existing_slugs)} existing records")
+
+        if warm_translation_cache and translation_service:
+            warmed = translation_service.warm_cache(translation_cache_entries(existing_action_records))
+            print(f"Warmed translation cache with {warmed} existing translations")
+
+        self._write_lock = threading.Lock()
+
+    def _actions(self, template: AlexlabTemplate, translate: bool, include_dup: bool) -> list[AlexlabAction]:
+        return list(iter_actions(
+            templates=[template],
+            arguments=self.arguments,
+            existing_index=self.existing_slugs,
+            extra_country_languages=self.extra_country_languages,
+            translation_service=self.translation_service,
+            should_translate=translate,
+            include_dup=include_dup,
+            translation_strategy=self.translation_strategy,
+        ))
+
+    def render(
+        self,
+        template: AlexlabTemplate,
+        translate: bool = None,
+        write: bool = False,
+        include_dup: bool = False,
+    ) -> list[AlexlabAction]:
+        """
+        Generates the actions of a template.
+
+        Args:
+            template (AlexlabTemplate): The template to render.
+            translate (bool, optional): Whether to translate the interpolations, by default if a translation service is given.
+            write (bool, optional): Whether to add the new and updated actions to the output file.
+            include_dup (bool, optional): Whether to also return the actions which are unchanged.
+
+        Returns:
+            list: The actions, along with their diff status.
+        """
+        if translate is None:
+            translate = self.translation_service is not None
+        if not write:
+            return self._actions(template, translate, include_dup)
+
+        with self._write_lock:
+            actions = self._actions(template, translate, include_dup)
+            previous_length = len(self.output_df)
+            output_df = apply_actions(self.output_df, actions)
+            save_actions(output_df, self.output_path)
+            self.existing_slugs = self.existing_slugs.extend(written_records(output_df, actions, previous_length))
+            self.output_df = output_df
+        return actions
+
+
+def action_json(action: AlexlabAction) -> dict:
+    return {
+        **action.to_record(),
+        "diff_status": action.diff_status.value,
+        "existing_record_id": action.existing_record_id,
+    }
+
+
+def _pop_option(body: dict, name: str, default: bool) -> bool:
+    value = body.pop(name, default)
+    if not isinstance(value, bool):
+        raise ValueError(f"Expected a boolean for {name}, got {value!r}")
+    return value
+
+
+def make_request_handler(service: RenderService):
+    """
+    Builds the HTTP request handler of a render service.
+
+    Endpoints:
+        GET /health: The number of existing records.
+        POST /render: Renders the template given as a JSON object with the columns of the templates CSV file,
+            lists being allowed for the comma-separated ones. The boolean "translate" (true by default if the
+            service has a translation service), "write" and "include_dup" (false by default) options can be added
+            to the object.
+
+    Args:
+        service (RenderService): The service to expose.
+
+    Returns:
+        type: The request handler class.
+    """
+    class RenderRequestHandler(BaseHTTPRequestHandler):
+
+        def _send(self, status: int, body: dict):
+            content = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def do_GET(self):
+            if self.path != "/health":
+                return self._send(404, {"error": f"Unknown endpoint {self.path}"})
+            self._send(200, {"status": "ok", "records": len(service.existing_slugs)})
+
+        def do_POST(self):
+            if self.path != "/render":
+                return self._send(404, {"error": f"Unknown endpoint {self.path}"})
+
+            start = time.perf_counter()
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not isinstance(body, dict):
+                    raise ValueError("Expected a JSON object")
+                translate = _pop_option(body, "translate", service.translation_service is not None)
+                write = _pop_option(body, "write", False)
+                include_dup = _pop_option(body, "include_dup", False)
+                # Cells as they would be read from the templates CSV file
+                template = template_from_row({
+                    column: ",".join(map(str, value)) if isinstance(value, list) else "" if value is None else str(value)
+                    for column, value in body.items()
+                })
+                actions = service.render(template, translate=translate, write=write, include_dup=include_dup)
+            except KeyError as e:
+                return self._send(400, {"error": f"Missing field {e}"})
+            except (ValueError, TypeError, NotImplementedError) as e:
+                # Invalid JSON, template or arguments
+                return self._send(400, {"error": str(e)})
+            except Exception as e:
+                logger.error(f"ERROR: {e}")
+                return self._send(500, {"error": str(e)})
+
+            self._send(200, {
+                "template": template.name,
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+                "actions": [action_json(action) for action in actions],
+            })
+
+        def log_message(self, format, *args):
+            logger.info(f"{self.address_string()} {format % args}")
+
+    return RenderRequestHandler
+
+
+def serve_render_service(host: str, port: int, service: RenderService):
+    """
+    Serves a render service over HTTP until interrupted.
+
+    Args:
+        host (str): The interface to listen on.
+        port (int): The port to listen on.
+        service (RenderService): The service to expose.
+    """
+    server = ThreadingHTTPServer((host, port), make_request_handler(service))
+    print(f"Serving on http://{host}:{server.server_port}, press Ctrl+C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped serving")
+    finally:
+        server.server_close()
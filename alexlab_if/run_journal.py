@@ -0,0 +1,118 @@
+import json
+import logging
+import os
+import threading
+
+from alexlab_if.alexlab_models import AlexlabTemplate, LanguageEnum
+
+logger = logging.getLogger()
+
+
+class RunJournal:
+    """
+    Append-only journal of the work units completed by a run, one JSON object per line.
+
+    Two kinds of units are recorded as soon as they are completed: the translations
+    and the templates whose actions have been written to the output file. A run
+    that crashed halfway can then be resumed without repeating them.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        # Translations and templates may be recorded from different threads
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def path_for(output_path: str) -> str:
+        return f"{output_path}.journal"
+
+    @staticmethod
+    def template_key(template: AlexlabTemplate) -> str:
+        return f"{template.name}__{template.fingerprint}"
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.path)
+
+    def load(self) -> tuple[list[tuple[str, LanguageEnum, LanguageEnum, str]], set[str]]:
+        """
+        Loads the units completed by a previous run.
+
+        Returns:
+            tuple: The (text, source_lang, target_lang, translation) tuples and the keys of the completed templates.
+        """
+        translations = []
+        completed_templates = set()
+        if not self.exists():
+            return translations, completed_templates
+
+        with open(self.path, "rt") as journal_file:
+            for line in journal_file:
+                try:
+                    unit = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line might have been cut short by a crash
+                    logger.warning(f"Skipping corrupted journal line: {line!r}")
+                    continue
+
+                if unit["unit"] == "translation":
+                    translations.append((
+                        unit["text"],
+                        LanguageEnum(unit["source_lang"]),
+                        LanguageEnum(unit["target_lang"]),
+                        unit["translation"],
+                    ))
+                elif unit["unit"] == "template":
+                    completed_templates.add(unit["key"])
+
+        return translations, completed_templates
+
+    def open(self, resume: bool = False):
+        """
+        Opens the journal for writing.
+
+        Args:
+            resume (bool, optional): Whether to keep the units recorded by a previous run.
+
+        Raises:
+            FileExistsError: If a previous run left a journal behind and it isn't resumed, so that its translations aren't lost.
+        """
+        if not resume and self.exists():
+            raise FileExistsError(
+                f"{self.path} was left by an interrupted run, run again with --resume to continue it, or delete it to start over"
+            )
+        self._file = open(self.path, "at" if resume else "wt")
+
+    def _append(self, unit: dict, sync: bool = False):
+        line = json.dumps(unit) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+
+    def record_translation(self, text: str, source_lang: LanguageEnum, target_lang: LanguageEnum, translation: str):
+        self._append(dict(
+            unit="translation",
+            text=text,
+            source_lang=source_lang.value,
+            target_lang=target_lang.value,
+            translation=translation,
+        ))
+
+    def record_template(self, template: AlexlabTemplate):
+        self._append(dict(unit="template", key=self.template_key(template)), sync=True)
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def remove(self):
+        """
+        Closes and deletes the journal, once the run it belongs to is complete.
+        """
+        self.close()
+        if self.exists():
+            os.remove(self.path)
@@ -0,0 +1,157 @@
+import time
+from itertools import zip_longest
+from typing import Iterable, Optional
+
+from alexlab_if.action_stream import PlatformDiff
+from alexlab_if.alexlab_models import AlexlabInterpolation, AlexlabTemplate
+from alexlab_if.translation import TranslationService
+
+# An interpolation with the diff status of every target platform
+Diff = tuple[AlexlabInterpolation, list[PlatformDiff]]
+
+
+def prioritize_templates(templates: Iterable[AlexlabTemplate]) -> list[AlexlabTemplate]:
+    """
+    Sorts templates by priority, the most urgent first.
+
+    Args:
+        templates (Iterable[AlexlabTemplate]): The templates, in the order of the file.
+
+    Returns:
+        list: The templates by increasing priority, those without priority last, in the order of the file otherwise.
+    """
+    return sorted(templates, key=lambda template: (template.priority is None, template.priority or 0))
+
+
+def split_samples(diffs: list[Diff], min_samples: int) -> tuple[list[Diff], list[Diff]]:
+    """
+    Splits the classified interpolations of a template into its samples and its remainder.
+
+    The samples are the first min_samples interpolations to generate, taken in turn from
+    each country and language so that they cover as many of them as possible, along with
+    the interpolations which don't need to be generated, as they don't need any translation.
+
+    Args:
+        diffs (list[Diff]): The classified interpolations, as returned by diff_interpolations.
+        min_samples (int): The number of interpolations to generate first.
+
+    Returns:
+        tuple: The samples and the remainder, both in the order of the interpolations.
+    """
+    pending_by_country_language: dict[tuple, list[Diff]] = {}
+    for diff in diffs:
+        interpolation = diff[0]
+        if interpolation.target_platforms:
+            pending_by_country_language.setdefault(
+                (interpolation.country, interpolation.language), []
+            ).append(diff)
+
+    interleaved = [
+        diff
+        for round_diffs in zip_longest(*pending_by_country_language.values())
+        for diff in round_diffs
+        if diff is not None
+    ]
+    sampled = {id(interpolation) for interpolation, _ in interleaved[:min_samples]}
+
+    samples = [
+        diff for diff in diffs if not diff[0].target_platforms or id(diff[0]) in sampled
+    ]
+    remainder = [
+        diff for diff in diffs if diff[0].target_platforms and id(diff[0]) not in sampled
+    ]
+    return samples, remainder
+
+
+def has_remainder_phase(template: AlexlabTemplate, budget: "RunBudget") -> bool:
+    """
+    Checks whether the remainder of a template is generated in a second pass, after the samples of every template.
+
+    Without samples to put first nor any limit to defer the remainder, the template is generated in a single pass.
+
+    Args:
+        template (AlexlabTemplate): The template.
+        budget (RunBudget): The limits of the run.
+
+    Returns:
+        bool: Whether the template is split into its samples and its remainder.
+    """
+    return template.min_samples > 0 or budget.is_limited
+
+
+class RunBudget:
+    """
+    The limits of a run, after which the remaining work is deferred.
+
+    Attributes:
+        deadline (Optional[float]): The number of seconds the run may last.
+        translation_budget (Optional[int]): The number of remote translations the run may request.
+    """
+
+    def __init__(
+        self,
+        deadline: Optional[float] = None,
+        translation_budget: Optional[int] = None,
+        translation_service: TranslationService = None,
+    ):
+        self.deadline = deadline
+        self.translation_budget = translation_budget
+        self.translation_service = translation_service
+        self._start = time.monotonic()
+        self._start_translations = self._remote_translations()
+
+    def _remote_translations(self) -> int:
+        return self.translation_service.remote_translations if self.translation_service else 0
+
+    @property
+    def is_limited(self) -> bool:
+        return self.deadline is not None or self.translation_budget is not None
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._start
+
+    @property
+    def translations(self) -> int:
+        return self._remote_translations() - self._start_translations
+
+    def exhausted_reason(self) -> Optional[str]:
+        """
+        Checks whether the run went over one of its limits.
+
+        Returns:
+            Optional[str]: The limit which was reached, or None if there is still time and budget left.
+        """
+        if self.deadline is not None and self.elapsed >= self.deadline:
+            return f"Deadline of {self.deadline:g}s reached"
+        if self.translation_budget is not None and self.translations >= self.translation_budget:
+            return f"Translation budget of {self.translation_budget} reached"
+        return None
+
+    def batch_size(self, batch_size: int) -> int:
+        """
+        Caps a number of interpolations to translate together to the remaining translation budget.
+
+        Args:
+            batch_size (int): The usual number of interpolations translated together.
+
+        Returns:
+            int: The number of interpolations to translate next.
+        """
+        if self.translation_budget is None:
+            return batch_size
+        return max(1, min(batch_size, self.translation_budget - self.translations))
+
+
+def print_deferred_report(deferred: dict[str, tuple[Optional[int], int]], reason: Optional[str]):
+    """
+    Prints the templates whose interpolations were deferred to a later run.
+
+    Args:
+        deferred (dict[str, tuple[Optional[int], int]]): The priority and number of deferred interpolations by template name.
+        reason (Optional[str]): The limit which was reached.
+    """
+    print(f"\n{reason or 'Run stopped'}, deferred interpolations")
+    print(f"Template\tPriority\tDeferred")
+    for template_name, (priority, count) in deferred.items():
+        print(f"{template_name}\t{priority if priority is not None else '-'}\t{count}")
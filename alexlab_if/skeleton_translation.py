@@ -0,0 +1,86 @@
+from functools import lru_cache
+from typing import Optional
+
+from alexlab_if.alexlab_models import AlexlabInterpolation, LanguageEnum, alexlab_jinja_env
+
+TRANSLATION_STRATEGIES = ["full", "skeleton"]
+
+# Token standing for the argument in the skeleton, meant to be copied untouched by the translation model
+SKELETON_MARKER = "ZXQ"
+
+# Languages where the form of a noun depends on its role in the sentence (cases, noun classes…),
+# so that an argument translated on its own can't be inserted back as is
+INFLECTED_LANGUAGES = {
+    LanguageEnum.ar,
+    LanguageEnum.cs,
+    LanguageEnum.de,
+    LanguageEnum.el,
+    LanguageEnum.pl,
+    LanguageEnum.ro,
+    LanguageEnum.sk,
+    LanguageEnum.sw,
+}
+
+
+@lru_cache(maxsize=1024)
+def template_skeleton(values: str, placeholder: str) -> str:
+    """
+    Renders a template string with its placeholder replaced by the skeleton marker.
+
+    Args:
+        values (str): The canonical template string.
+        placeholder (str): The placeholder of the template.
+
+    Returns:
+        str: The skeleton of the template.
+    """
+    return alexlab_jinja_env().from_string(values).render({placeholder: SKELETON_MARKER})
+
+
+def is_skeleton_translatable(interpolation: AlexlabInterpolation) -> bool:
+    """
+    Checks whether an interpolation can be translated as its skeleton and its argument.
+
+    Args:
+        interpolation (AlexlabInterpolation): The interpolation to translate.
+
+    Returns:
+        bool: Whether the interpolation has a single argument, in a language which doesn't inflect it.
+    """
+    return (
+        interpolation.placeholder is not None
+        and len(interpolation.arguments) == 1
+        and interpolation.language not in INFLECTED_LANGUAGES
+        and SKELETON_MARKER in template_skeleton(interpolation.template.values, interpolation.placeholder)
+    )
+
+
+def skeleton_survives(skeleton: str, translated_skeleton: str) -> bool:
+    """
+    Checks whether the marker of a skeleton came back intact from its translation.
+
+    Args:
+        skeleton (str): The skeleton before translation.
+        translated_skeleton (str): The translated skeleton.
+
+    Returns:
+        bool: Whether the translated argument can be inserted into the translated skeleton.
+    """
+    return translated_skeleton.count(SKELETON_MARKER) == skeleton.count(SKELETON_MARKER)
+
+
+def compose_skeleton(skeleton: str, translated_skeleton: str, translated_argument: str) -> Optional[str]:
+    """
+    Inserts a translated argument into a translated skeleton.
+
+    Args:
+        skeleton (str): The skeleton before translation.
+        translated_skeleton (str): The translated skeleton.
+        translated_argument (str): The translated argument.
+
+    Returns:
+        Optional[str]: The translated interpolation, or None if the marker didn't survive the translation.
+    """
+    if not skeleton_survives(skeleton, translated_skeleton):
+        return None
+    return translated_skeleton.replace(SKELETON_MARKER, translated_argument)
@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+from functools import cached_property
+from typing import TYPE_CHECKING, Iterator, Mapping, Optional
+
+from alexlab_if.utils import parse_rev_date, trailing_platform_slug
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+
+class SlugTable(Mapping[str, dict]):
+    """
+    Compact index of the latest revision records by slug in the format name__cc__lang__arg__platform.
+
+    Rather than a dictionary of concatenated slugs, it keeps NumPy arrays of 64-bit slug hashes,
+    sorted for binary search, along with the record ids, the revision dates as epochs and the
+    fingerprints. The concatenated slugs aren't stored again: hits are verified against the slug
+    and platform columns of the records, so that a hash collision can't cause a false match.
+
+    It has the same semantics as a dictionary mapping each slug to the record id, revision date
+    and content fingerprint: when a slug is duplicated, the last record wins, and the slug is only
+    iterated and counted once. The number of records, duplicates included, is given by records.
+    """
+
+    # Number of slugs concatenated at once while hashing, to bound the memory used to build the table
+    CHUNK_SIZE = 100_000
+
+    # Hash of the missing fingerprints of the records written before fingerprints were introduced,
+    # which has_fingerprints tells apart from a real fingerprint hashing to 0
+    NO_FINGERPRINT = 0
+
+    def __init__(self, existing_action_records: pd.DataFrame):
+        import numpy as np
+        import pandas as pd
+
+        self._slugs = existing_action_records["slug"].to_numpy(dtype=object)
+        self._platforms = existing_action_records["platform"].to_numpy(dtype=object)
+        self._rev_dates = existing_action_records["rev_date"].to_numpy(dtype=object)
+        # Files written before fingerprints were introduced have no such column
+        self._fingerprints = (
+            existing_action_records["fingerprint"].to_numpy(dtype=object)
+            if "fingerprint" in existing_action_records
+            else np.full(len(existing_action_records), None, dtype=object)
+        )
+
+        hashes = np.concatenate([np.empty(0, dtype=np.uint64)] + [
+            self.hash_slugs([
+                trailing_platform_slug(slug, platform)
+                for slug, platform in zip(self._slugs[start:start + self.CHUNK_SIZE], self._platforms[start:start + self.CHUNK_SIZE])
+            ])
+            for start in range(0, len(self._slugs), self.CHUNK_SIZE)
+        ])
+
+        # Stable, so that duplicated slugs keep the order of the records
+        self._order = np.argsort(hashes, kind="stable")
+        self.hashes: np.ndarray = hashes[self._order]
+        self.ids: np.ndarray = existing_action_records.index.to_numpy()[self._order]
+
+        # Revision dates are few, so each distinct one is only parsed once
+        rev_date_codes, distinct_rev_dates = pd.factorize(self._rev_dates)
+        distinct_rev_epochs = np.array(
+            [pd.Timestamp(parse_rev_date(rev_date)).value for rev_date in distinct_rev_dates], dtype=np.int64
+        )
+        self.rev_epochs: np.ndarray = distinct_rev_epochs[rev_date_codes][self._order]
+
+        self.fingerprints: np.ndarray = np.array(
+            [self.hash_fingerprint(fingerprint) for fingerprint in self._fingerprints], dtype=np.uint64
+        )[self._order]
+        self.has_fingerprints: np.ndarray = np.array(
+            [isinstance(fingerprint, str) for fingerprint in self._fingerprints], dtype=bool
+        )[self._order]
+
+    def extend(self, existing_action_records: pd.DataFrame) -> SlugTable:
+        """
+        Adds records to a copy of the table, only hashing the added ones.
+
+        The added records supersede the records with the same slug, as if they came last in the history,
+        so that the records written or modified since the table was built can be added as they are.
+
+        Args:
+            existing_action_records (DataFrame): The records to add.
+
+        Returns:
+            SlugTable: The extended table.
+        """
+        import numpy as np
+
+        added = SlugTable(existing_action_records)
+        table = SlugTable.__new__(SlugTable)
+        table._slugs = np.concatenate([self._slugs, added._slugs])
+        table._platforms = np.concatenate([self._platforms, added._platforms])
+        table._rev_dates = np.concatenate([self._rev_dates, added._rev_dates])
+        table._fingerprints = np.concatenate([self._fingerprints, added._fingerprints])
+
+        # The added records are already sorted, so they are merged in rather than sorting the whole table again,
+        # each after the existing records with the same hash so that it supersedes them
+        positions = self.hashes.searchsorted(added.hashes, side="right")
+        table._order = np.insert(self._order, positions, added._order + len(self._slugs))
+        table.hashes = np.insert(self.hashes, positions, added.hashes)
+        table.ids = np.insert(self.ids, positions, added.ids)
+        table.rev_epochs = np.insert(self.rev_epochs, positions, added.rev_epochs)
+        table.fingerprints = np.insert(self.fingerprints, positions, added.fingerprints)
+        table.has_fingerprints = np.insert(self.has_fingerprints, positions, added.has_fingerprints)
+        return table
+
+    @staticmethod
+    def hash_slugs(slugs: list[str]) -> np.ndarray:
+        """
+        Hashes slugs in the format name__cc__lang__arg__platform to 64-bit integers.
+
+        Args:
+            slugs (list[str]): The slugs to hash.
+
+        Returns:
+            ndarray: The hash of each slug.
+        """
+        import numpy as np
+        import pandas as pd
+
+        return pd.util.hash_array(np.asarray(slugs, dtype=object), categorize=False)
+
+    @classmethod
+    def hash_fingerprint(cls, fingerprint: Optional[str]) -> int:
+        return int(fingerprint, 16) if isinstance(fingerprint, str) else cls.NO_FINGERPRINT
+
+    def _verify(self, row: int, slug: str) -> bool:
+        position = self._order[row]
+        return trailing_platform_slug(self._slugs[position], self._platforms[position]) == slug
+
+    def find(self, slug: str, slug_hash: int = None) -> Optional[int]:
+        """
+        Finds the row of a slug in the sorted arrays.
+
+        Args:
+            slug (str): The slug in the format name__cc__lang__arg__platform.
+            slug_hash (int, optional): The precomputed hash of the slug.
+
+        Returns:
+            Optional[int]: The row of the slug, or None if it doesn't exist.
+        """
+        if slug_hash is None:
+            slug_hash = self.hash_slugs([slug])[0]
+        first = self.hashes.searchsorted(slug_hash, side="left")
+        last = self.hashes.searchsorted(slug_hash, side="right")
+        # The last matching record wins, as it would in a dictionary
+        for row in range(last - 1, first - 1, -1):
+            if self._verify(row, slug):
+                return row
+        return None
+
+    def find_many(self, slugs: list[str]) -> list[Optional[int]]:
+        """
+        Finds the rows of several slugs at once, hashing them together.
+
+        Args:
+            slugs (list[str]): The slugs in the format name__cc__lang__arg__platform.
+
+        Returns:
+            list: The row of each slug, or None if it doesn't exist.
+        """
+        if not slugs:
+            return []
+        slug_hashes = self.hash_slugs(slugs)
+        firsts = self.hashes.searchsorted(slug_hashes, side="left")
+        lasts = self.hashes.searchsorted(slug_hashes, side="right")
+        return [
+            next((row for row in range(last - 1, first - 1, -1) if self._verify(row, slug)), None)
+            for slug, first, last in zip(slugs, firsts.tolist(), lasts.tolist())
+        ]
+
+    def join(self, slugs: np.ndarray, platforms: np.ndarray) -> np.ndarray:
+        """
+        Finds the rows of several slugs at once, verifying the hits with vectorised comparisons.
+
+        Args:
+            slugs (ndarray): The slugs in the format name__cc__lang__arg, as objects.
+            platforms (ndarray): The platform of each slug, as objects.
+
+        Returns:
+            ndarray: The row of each slug, or -1 if it doesn't exist.
+        """
+        import numpy as np
+
+        if len(self.hashes) == 0:
+            return np.full(len(slugs), -1, dtype=np.int64)
+
+        slug_hashes = self.hash_slugs(slugs + "__" + platforms)
+        firsts = self.hashes.searchsorted(slug_hashes, side="left")
+        lasts = self.hashes.searchsorted(slug_hashes, side="right")
+
+        # The last matching record wins, as it would in a dictionary
+        rows = np.where(lasts > firsts, lasts - 1, -1)
+        positions = self._order[np.maximum(rows, 0)]
+        verified = (rows >= 0) & (self._slugs[positions] == slugs) & (self._platforms[positions] == platforms)
+
+        # Only duplicated slugs and hash collisions need to look further back
+        for i in np.flatnonzero(~verified & (lasts - firsts > 1)):
+            row = self.find(trailing_platform_slug(slugs[i], platforms[i]), slug_hashes[i])
+            verified[i], rows[i] = row is not None, row if row is not None else -1
+
+        return np.where(verified, rows, -1)
+
+    def record(self, row: int) -> dict:
+        """
+        Retrieves the record at a row of the sorted arrays.
+
+        Args:
+            row (int): The row, as returned by find().
+
+        Returns:
+            dict: The record id, revision date and content fingerprint.
+        """
+        position = self._order[row]
+        fingerprint = self._fingerprints[position]
+        return {
+            "id": self.ids[row],
+            "rev_date": self._rev_dates[position],
+            "fingerprint": fingerprint if isinstance(fingerprint, str) else None,
+        }
+
+    def __contains__(self, slug: object) -> bool:
+        return isinstance(slug, str) and self.find(slug) is not None
+
+    def __getitem__(self, slug: str) -> dict:
+        row = self.find(slug)
+        if row is None:
+            raise KeyError(slug)
+        return self.record(row)
+
+    @property
+    def records(self) -> int:
+        return len(self.hashes)
+
+    def __iter__(self) -> Iterator[str]:
+        # In the order of their first record, as in a dictionary
+        seen = set()
+        for slug, platform in zip(self._slugs, self._platforms):
+            slug = trailing_platform_slug(slug, platform)
+            if slug not in seen:
+                seen.add(slug)
+                yield slug
+
+    @cached_property
+    def _distinct_slugs(self) -> int:
+        import numpy as np
+
+        if len(self.hashes) == 0:
+            return 0
+        starts = np.flatnonzero(np.concatenate([[True], self.hashes[1:] != self.hashes[:-1]]))
+        ends = np.append(starts[1:], len(self.hashes))
+        # Only the rows sharing a hash, duplicated slugs or collisions, need their slugs compared
+        repeated = ends - starts > 1
+        return len(starts) + sum(
+            len({
+                trailing_platform_slug(self._slugs[position], self._platforms[position])
+                for position in self._order[start:end]
+            }) - 1
+            for start, end in zip(starts[repeated].tolist(), ends[repeated].tolist())
+        )
+
+    def __len__(self) -> int:
+        return self._distinct_slugs
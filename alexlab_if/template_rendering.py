@@ -1,12 +1,12 @@
 import csv
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
 from collections import defaultdict
+from functools import lru_cache
 from importlib import resources
 import logging
 
-from jinja2 import Template as JinjaTemplate
-
 from alexlab_if.alexlab_models import (
+    ArgumentIndex,
     LanguageEnum,
     AlexlabVariable,
     AlexlabInterpolation,
@@ -40,6 +40,60 @@ def country_languages(country: CountryEnum, extra_country_languages: List[Tuple[
 
 
 
+def valid_template_countries(template: AlexlabTemplate, variables: ArgumentIndex, placeholder: str) -> list[CountryEnum]:
+    """
+    Retrieves the target countries of a template which have arguments for its placeholder.
+
+    Args:
+        template (AlexlabTemplate): The template.
+        variables (ArgumentIndex): The index of the variables.
+        placeholder (str): The placeholder of the template.
+
+    Returns:
+        list: The target countries with non-discarded arguments, in the order of the template.
+
+    Raises:
+        ValueError: If a target country has no argument at all for the placeholder.
+    """
+    arguments_by_country = variables.arguments_by_country(placeholder)
+    # Keeps the order of the target countries, for the output to be deterministic
+    valid_countries = [
+        country for country in template.target_countries if country in arguments_by_country
+    ]
+    missing_countries = set(template.target_countries).difference(
+        set(valid_countries)
+    )
+    discarded_countries = {
+        country
+        for argument in variables[placeholder].arguments
+        for country in argument.countries
+        if country in missing_countries
+    }
+    if discarded_countries:
+        print(f"All arguments for countries {discarded_countries} for placeholder '{placeholder}' are discarded, skipping them.")
+    if missing_countries - discarded_countries:
+        raise ValueError(
+            f"Missing arguments for countries {missing_countries - discarded_countries} for placeholder '{placeholder}'"
+        )
+    return valid_countries
+
+
+@lru_cache(maxsize=1024)
+def compiled_template(values: str):
+    """
+    Compiles a template string once, as long-running processes render the same templates again and again.
+
+    Args:
+        values (str): The canonical template string.
+
+    Returns:
+        Template: The compiled Jinja template.
+    """
+    from jinja2 import Template as JinjaTemplate
+
+    return JinjaTemplate(values)
+
+
 class PromptCounter:
     value = 0
 
@@ -80,30 +134,37 @@ def template_report(counter, template, **kwargs):
     counter.value = counter.value + template_tot
 
 
-def interpolate_template_and_arguments(
+def iter_interpolations(
     template: AlexlabTemplate,
-    variables: list[AlexlabVariable],
+    variables: Union[ArgumentIndex, Iterable[AlexlabVariable]],
     counter=PromptCounter(),
-    extra_country_languages = []
-) -> List[AlexlabInterpolation]:
+    extra_country_languages = [],
+    report: bool = True,
+) -> Iterator[AlexlabInterpolation]:
     """
-    Interpolates the given template with the provided variables and generates a list of interpolations.
+    Interpolates the given template with the provided variables, rendering the interpolations as they are iterated.
+
+    The placeholders are checked and the template report is printed straight away, only the
+    rendering of the interpolations is deferred.
 
     Args:
         template (AlexlabTemplate): The template to interpolate.
-        variables (list[AlexlabVariable]): The variables to use for interpolation.
+        variables (Union[ArgumentIndex, Iterable[AlexlabVariable]]): The variables to use for interpolation,
+            preferably as the index built once by load_arguments_from_csv.
         counter (PromptCounter, optional): A counter for tracking the number of interpolations.
         extra_country_languages (list, optional): Additional country-language pairs.
+        report (bool, optional): Whether to print the template report.
 
     Returns:
-        list: A list of interpolations.
+        Iterator: The interpolations, rendered one at a time.
     """
    
     # case 0: no placeholders
     if len(template.placeholders) == 0:
-        template_report(counter, template)
+        if report:
+            template_report(counter, template)
 
-        return [
+        return (
             AlexlabInterpolation(
                 text=template.values,
                 template=template,
@@ -116,62 +177,51 @@ def interpolate_template_and_arguments(
             )
             for country in template.target_countries
             for target_language in template.target_languages if target_language in country_languages(country, extra_country_languages)
-        ]
+        )
 
     # case 1: exactly one placeholder
     elif len(template.placeholders) == 1:
         placeholder = list(template.placeholders)[0]
-        relevant_placeholders = list(
-            filter(lambda v: v.placeholder == placeholder, variables)
-        )
-        if not relevant_placeholders:
+        if not isinstance(variables, ArgumentIndex):
+            variables = ArgumentIndex(variables)
+        if placeholder not in variables:
             
             print("Not relevant placeholders: ")
-            print(variables)
+            print(list(variables.values()))
     
             raise ValueError(
                 f"Placeholder {placeholder} was found in the template, but no arguments were provided for it."
             )
-        relevant_variable = relevant_placeholders[0]  # since there is only one
-        arguments_by_country: defaultdict[CountryEnum, list[str]] = defaultdict(list)
-        for argument_value in relevant_variable.arguments:
-            for country in argument_value.countries:
-                arguments_by_country[country].append(argument_value.value)
-        valid_countries = set(template.target_countries).intersection(
-            set(arguments_by_country.keys())
-        )
-        missing_countries = set(template.target_countries).difference(
-            set(valid_countries)
-        )
-        if missing_countries:
-            raise ValueError(
-                f"Missing arguments for countries {missing_countries} for placeholder '{relevant_variable.placeholder}'"
+        relevant_variable = variables[placeholder]
+        arguments_by_country = variables.arguments_by_country(placeholder)
+        valid_countries = valid_template_countries(template, variables, placeholder)
+        jinja_template = compiled_template(template.values)
+
+        if report:
+            template_report(
+                counter,
+                template,
+                relevant_variable=relevant_variable,
+                arguments_by_country=arguments_by_country,
+                valid_countries=valid_countries,
             )
-        jinja_template = JinjaTemplate(template.values)
-
-        template_report(
-            counter,
-            template,
-            relevant_variable=relevant_variable,
-            arguments_by_country=arguments_by_country,
-            valid_countries=valid_countries,
-        )
 
-        return [
+        return (
             AlexlabInterpolation(
-                text=jinja_template.render({relevant_variable.placeholder: value}),
+                text=jinja_template.render({relevant_variable.placeholder: argument.value}),
                 template=template,
                 country=country,
                 language=target_language,
                 placeholder=relevant_variable.placeholder,
                 rev_date=template.rev_date,
-                arguments=[value],
+                arguments=[argument.value],
+                argument_slugs=[argument.slug],
                 is_translated=(target_language == template.language),
             )
             for country in valid_countries
-            for value in arguments_by_country[country]
+            for argument in arguments_by_country[country]
             for target_language in template.target_languages if target_language in country_languages(country, extra_country_languages)
-        ]
+        )
     # case 2: more than one placeholder
     else:
         # the result has to be a matrix multiplication product per country
@@ -179,6 +229,30 @@ def interpolate_template_and_arguments(
         raise NotImplementedError("Only one placeholder is allowed per template")
 
 
+def interpolate_template_and_arguments(
+    template: AlexlabTemplate,
+    variables: Union[ArgumentIndex, Iterable[AlexlabVariable]],
+    counter=PromptCounter(),
+    extra_country_languages = [],
+    report: bool = True,
+) -> List[AlexlabInterpolation]:
+    """
+    Interpolates the given template with the provided variables and generates a list of interpolations.
+
+    Args:
+        template (AlexlabTemplate): The template to interpolate.
+        variables (Union[ArgumentIndex, Iterable[AlexlabVariable]]): The variables to use for interpolation,
+            preferably as the index built once by load_arguments_from_csv.
+        counter (PromptCounter, optional): A counter for tracking the number of interpolations.
+        extra_country_languages (list, optional): Additional country-language pairs.
+        report (bool, optional): Whether to print the template report.
+
+    Returns:
+        list: A list of interpolations.
+    """
+    return list(iter_interpolations(template, variables, counter, extra_country_languages, report))
+
+
 def load_templates_from_csv(input_template_path) -> list[AlexlabTemplate]:
     """
     Loads templates from a CSV file.
@@ -200,30 +274,43 @@ def load_templates_from_csv(input_template_path) -> list[AlexlabTemplate]:
     templates = []
     for raw_row in rows:
         row = { col_name: raw_row[i] for i, col_name in enumerate(header) }
-        template = AlexlabTemplate(
-                name=row["template_slug"],
-                values=row["values"],
-                language=LanguageEnum(row["language"]),
-                target_countries=[
-                    CountryEnum(tc) for tc in row["target_countries"].split(",")
-                ],
-                rev_date = row["rev_date"],
-                target_platforms=[
-                    PlatformEnum(tp) for tp in row["target_platforms"].split(",")
-                ],
-                target_languages=[
-                    LanguageEnum(tl) for tl in row["target_languages"].split(',')
-                ],
-                status=row["status"],
-                experiment_slug=row["experiment_slug"],
-            )
-
-        templates.append(template)
+        templates.append(template_from_row(row))
 
     return templates
 
 
-def load_arguments_from_csv(input_argument_path) -> dict[str, list[AlexlabVariable]]:
+def template_from_row(row: Dict[str, str]) -> AlexlabTemplate:
+    """
+    Builds a template from a row of the templates CSV file.
+
+    Args:
+        row (Dict[str, str]): The cells of the row, by column name.
+
+    Returns:
+        AlexlabTemplate: The template.
+    """
+    return AlexlabTemplate(
+        name=row["template_slug"],
+        values=row["values"],
+        language=LanguageEnum(row["language"]),
+        target_countries=[
+            CountryEnum(tc) for tc in row["target_countries"].split(",")
+        ],
+        rev_date = row["rev_date"],
+        target_platforms=[
+            PlatformEnum(tp) for tp in row["target_platforms"].split(",")
+        ],
+        target_languages=[
+            LanguageEnum(tl) for tl in row["target_languages"].split(',')
+        ],
+        status=row["status"],
+        experiment_slug=row["experiment_slug"],
+        priority=row.get("priority", ""),
+        min_samples=row.get("min_samples", ""),
+    )
+
+
+def load_arguments_from_csv(input_argument_path) -> ArgumentIndex:
     """
     Loads arguments from a CSV file.
 
@@ -231,7 +318,7 @@ def load_arguments_from_csv(input_argument_path) -> dict[str, list[AlexlabVariab
         input_argument_path (str): The path to the CSV file containing arguments.
 
     Returns:
-        dict: A dictionary of arguments grouped by placeholder.
+        ArgumentIndex: An immutable index of the arguments grouped by placeholder, and by country.
     """
     # skipping the header
     
@@ -264,7 +351,7 @@ def load_arguments_from_csv(input_argument_path) -> dict[str, list[AlexlabVariab
             )
         variables.append(AlexlabVariable(placeholder=placeholder.lower(), arguments=arguments))
 
-    return {variable.placeholder: variable for variable in variables}
+    return ArgumentIndex(variables)
 
 
 def _load_csv_file(csv_file_path: str):
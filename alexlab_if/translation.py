@@ -1,38 +1,333 @@
 import os
-import httpx
-from functools import lru_cache
-
-from gradio_client import Client
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, Optional, Union
 
 from alexlab_if.alexlab_models import LanguageEnum
+from alexlab_if.translation_memory import TranslationMemory
 
+logger = logging.getLogger()
 
-class TranslationService:
-    def __init__(self, gradio_src: str, hf_token: str):
+
+class RateLimitedError(Exception):
+    pass
+
+
+class EndpointUnavailableError(Exception):
+    """
+    Raised when a replica can't be reached or fails on its side, as opposed to a request it rejects.
+    """
+    pass
+
+
+class TranslationEndpoint:
+    """
+    A replica of the translation Gradio service, along with its health statistics.
+
+    Attributes:
+        gradio_src (str): The HuggingFace Space or URL of the replica.
+        weight (float): The share of the requests the replica should get compared to the others.
+        outstanding (int): The number of requests currently sent to the replica.
+        latency (Optional[float]): The moving average of the replica's response time, in seconds.
+        requests (int): The number of requests sent to the replica.
+        errors (int): The number of failed requests.
+        consecutive_failures (int): The number of failed requests since the last successful one.
+        consecutive_rate_limits (int): The number of rate limited requests since the last successful one.
+        unavailable_until (float): The time until which the replica is ejected, either by the circuit breaker or because it is rate limited.
+    """
+
+    LATENCY_SMOOTHING = 0.2
+
+    def __init__(self, gradio_src: str, hf_token: str, weight: float = 1):
+        if weight <= 0:
+            raise ValueError(f"The weight of {gradio_src} must be positive, got {weight:g}")
         self.gradio_src = gradio_src
         self.hf_token = hf_token
+        self.weight = weight
+        self.outstanding = 0
+        self.latency: Optional[float] = None
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.consecutive_rate_limits = 0
+        self.unavailable_until = 0.0
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    def get_gradio_client(self):
+        # Concurrent translations share a single client, created by the first one
+        with self._client_lock:
+            if self._client is None:
+                from gradio_client import Client
+
+                # URL is https://aiforensics-opus-mt-translation-ce.hf.space
+                # HF_TOKEN isn't needed as long as the space is public (default None)
+                self._client = Client(src=self.gradio_src, hf_token=self.hf_token)
+            return self._client
 
-    @lru_cache
-    def _get_gradio_client(self):
-        # URL is https://aiforensics-opus-mt-translation-ce.hf.space
-        # HF_TOKEN isn't needed as long as the space is public (default None)
-        return Client(src=self.gradio_src, hf_token=self.hf_token)   
+    def is_available(self, now: float) -> bool:
+        return now >= self.unavailable_until
 
+    @property
+    def load(self) -> float:
+        return (self.outstanding + 1) / self.weight
+
+    def predict(self, text: str, target_lang: LanguageEnum, source_lang: LanguageEnum):
+        import httpx
+        from gradio_client.utils import QueueError, TooManyRequestsError
+
+        try:
+            client = self.get_gradio_client()
+        except Exception as e:
+            raise EndpointUnavailableError(f"Could not connect to {self.gradio_src}: {e}") from e
 
-    @lru_cache(maxsize=5000)
-    def _cached_translate(self, text: str, target_lang: LanguageEnum, source_lang=LanguageEnum.en):
         try:
-            return self._get_gradio_client().predict(
+            return client.predict(
                 text=text,
                 source_lang=source_lang.value,
                 target_lang=target_lang.value,
                 api_name="/predict"
             )
-        except httpx.ReadTimeout:
+        except (TooManyRequestsError, QueueError) as e:
+            raise RateLimitedError(str(e)) from e
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 429:
+                raise RateLimitedError(str(e)) from e
+            if e.response.status_code >= 500:
+                raise EndpointUnavailableError(str(e)) from e
+            raise e
+        except (httpx.TransportError, TimeoutError, ConnectionError) as e:
+            raise EndpointUnavailableError(str(e)) from e
+
+    def __str__(self):
+        latency = f"{self.latency:.2f}s" if self.latency is not None else "n/a"
+        state = "ejected" if not self.is_available(time.monotonic()) else "healthy"
+        return f"{self.gradio_src}\t{state}\t{self.requests} requests\t{self.errors} errors\t{latency} latency"
+
+
+class TranslationService:
+    def __init__(
+        self,
+        gradio_src: Union[str, list[str]],
+        hf_token: str,
+        weights: Optional[list[float]] = None,
+        max_failures: int = 3,
+        cooldown: float = 30.0,
+        rate_limit_backoff: float = 2.0,
+        max_attempts: int = 5,
+        concurrency: Optional[int] = None,
+        memory: Optional[TranslationMemory] = None,
+    ):
+        """
+        Args:
+            gradio_src (Union[str, list[str]]): The HuggingFace Space or URL of one or more replicas of the translation service.
+            hf_token (str): The HuggingFace Token to use for all replicas.
+            weights (Optional[list[float]], optional): The weight of each replica, 1 by default.
+            max_failures (int, optional): The number of consecutive failures after which a replica is ejected.
+            cooldown (float, optional): The number of seconds an ejected replica waits before being tried again.
+            rate_limit_backoff (float, optional): The base number of seconds a rate limited replica is left alone, doubled at each consecutive rate limit.
+            max_attempts (int, optional): The number of attempts for each translation before giving up.
+            concurrency (Optional[int], optional): The number of concurrent translations, the total weight of the replicas by default.
+            memory (Optional[TranslationMemory], optional): A memory of the past translations, to reuse them for identical or nearly identical texts.
+        """
+        gradio_srcs = [gradio_src] if isinstance(gradio_src, str) else gradio_src
+        weights = weights or [1] * len(gradio_srcs)
+        self.endpoints = [
+            TranslationEndpoint(src, hf_token, weight) for src, weight in zip(gradio_srcs, weights)
+        ]
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.rate_limit_backoff = rate_limit_backoff
+        self.max_attempts = max_attempts
+        self.concurrency = concurrency or max(1, round(sum(weights)))
+        self._lock = threading.Lock()
+        # (text, source_lang, target_lang) -> translation
+        self._cache: dict[tuple[str, LanguageEnum, LanguageEnum], str] = {}
+        # Number of translations which weren't found in the cache
+        self.remote_translations = 0
+        self.memory = memory
+
+    def _acquire_endpoint(self) -> TranslationEndpoint:
+        """
+        Picks the available replica with the least outstanding requests relative to its weight,
+        waiting for one to come back if they are all ejected.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                available = [endpoint for endpoint in self.endpoints if endpoint.is_available(now)]
+                if available:
+                    endpoint = min(
+                        available, key=lambda e: (e.load, e.latency if e.latency is not None else 0)
+                    )
+                    endpoint.outstanding += 1
+                    endpoint.requests += 1
+                    return endpoint
+                wait = min(endpoint.unavailable_until for endpoint in self.endpoints) - now
+            logger.warning(f"All translation endpoints are unavailable, waiting {wait:.1f}s")
+            time.sleep(wait)
+
+    def _release_endpoint(self, endpoint: TranslationEndpoint, latency: float = None, error: Exception = None):
+        with self._lock:
+            endpoint.outstanding -= 1
+            now = time.monotonic()
+
+            if latency is not None:
+                endpoint.consecutive_failures = 0
+                endpoint.consecutive_rate_limits = 0
+                endpoint.latency = latency if endpoint.latency is None else (
+                    endpoint.LATENCY_SMOOTHING * latency + (1 - endpoint.LATENCY_SMOOTHING) * endpoint.latency
+                )
+
+            elif isinstance(error, RateLimitedError):
+                backoff = self.rate_limit_backoff * 2 ** endpoint.consecutive_rate_limits
+                endpoint.consecutive_rate_limits += 1
+                endpoint.unavailable_until = max(endpoint.unavailable_until, now + backoff)
+                logger.warning(f"Translation endpoint {endpoint.gradio_src} is rate limited, backing off for {backoff:.1f}s")
+
+            elif isinstance(error, EndpointUnavailableError):
+                endpoint.errors += 1
+                endpoint.consecutive_failures += 1
+                # Circuit breaker: once open, a single failure while half-open ejects the replica again
+                if endpoint.consecutive_failures >= self.max_failures:
+                    endpoint.unavailable_until = now + self.cooldown
+                    logger.warning(f"Translation endpoint {endpoint.gradio_src} ejected for {self.cooldown:.1f}s: {error}")
+
+            # Otherwise the request was rejected, which says nothing about the health of the replica
+
+    def _remote_translate(self, text: str, target_lang: LanguageEnum, source_lang=LanguageEnum.en):
+        last_error = None
+        for _ in range(self.max_attempts):
+            endpoint = self._acquire_endpoint()
+            start = time.monotonic()
+            try:
+                translation = endpoint.predict(text, target_lang, source_lang)
+            except (RateLimitedError, EndpointUnavailableError) as e:
+                self._release_endpoint(endpoint, error=e)
+                last_error = e
+                continue
+            except Exception as e:
+                # A rejected request would fail on every replica, so it isn't retried
+                self._release_endpoint(endpoint, error=e)
+                raise e
+            self._release_endpoint(endpoint, latency=time.monotonic() - start)
+            return translation
+
+        import httpx
+
+        if isinstance(last_error.__cause__, httpx.ReadTimeout):
             raise Exception("Translation service timed out, the HuggingFace Space might need a bit more time to boot. Please try again later.")
+        raise Exception(f"Translation failed after {self.max_attempts} attempts: {last_error}")
+
+
+    def check_health(self):
+        """
+        Connects to every replica, ejecting the ones that can't be reached.
+        """
+        for endpoint in self.endpoints:
+            try:
+                endpoint.get_gradio_client()
+            except Exception as e:
+                with self._lock:
+                    endpoint.errors += 1
+                    endpoint.consecutive_failures = self.max_failures
+                    endpoint.unavailable_until = time.monotonic() + self.cooldown
+                logger.warning(f"Translation endpoint {endpoint.gradio_src} is unreachable: {e}")
+
+
+    def report(self):
+        """
+        Prints the statistics of every replica.
+        """
+        print("\nTranslation endpoints")
+        for endpoint in self.endpoints:
+            print(endpoint)
+
+
+    def warm_cache(self, entries: Iterable[tuple[str, LanguageEnum, LanguageEnum, str]]) -> int:
+        """
+        Adds known translations to the cache, so that they are never requested to the remote service.
+
+        Args:
+            entries (Iterable[tuple[str, LanguageEnum, LanguageEnum, str]]): (text, source_lang, target_lang, translation) tuples.
+
+        Returns:
+            int: The number of translations added to the cache.
+        """
+        added = 0
+        for text, source_lang, target_lang, translation in entries:
+            key = (text, source_lang, target_lang)
+            if key not in self._cache:
+                self._cache[key] = translation
+                added += 1
+            if self.memory is not None:
+                self.memory.add(text, source_lang, target_lang, translation)
+        return added
 
 
     def translate(self, text: str, target_lang: LanguageEnum, source_lang=LanguageEnum.en):
+        return self._translate(text, target_lang, source_lang)[0]
+
+
+    def _translate(self, text: str, target_lang: LanguageEnum, source_lang=LanguageEnum.en) -> tuple[str, bool]:
+        """
+        Translates a text, from the cache or the memory if possible.
+
+        Returns:
+            tuple: The translation, and whether it was requested to the remote service.
+        """
         if target_lang == source_lang:
-            return text
-        return self._cached_translate(text, target_lang, source_lang)
+            return text, False
+        key = (text, source_lang, target_lang)
+        if key in self._cache:
+            return self._cache[key], False
+
+        match = self.memory.lookup(text, source_lang, target_lang) if self.memory is not None else None
+        if match and self.memory.accept(text, match):
+            self._cache[key] = match.translation
+            return self._cache[key], False
+
+        self._cache[key] = self._remote_translate(text, target_lang, source_lang)
+        with self._lock:
+            self.remote_translations += 1
+        if self.memory is not None:
+            self.memory.add(text, source_lang, target_lang, self._cache[key])
+        return self._cache[key], True
+
+
+    def translate_many(
+        self,
+        requests: list[tuple[str, LanguageEnum, LanguageEnum]],
+        on_translated: Callable[[str, LanguageEnum, LanguageEnum, str], None] = None,
+    ) -> list[str]:
+        """
+        Translates several texts concurrently, spreading them over the replicas.
+
+        Args:
+            requests (list[tuple[str, LanguageEnum, LanguageEnum]]): (text, source_lang, target_lang) tuples.
+            on_translated (Callable, optional): Called in the calling thread with (text, source_lang, target_lang, translation)
+                as soon as each distinct text is translated by the remote service, rather than found in the cache or the memory.
+
+        Returns:
+            list: The translations, in the same order as the requests.
+        """
+        distinct_requests = list(dict.fromkeys(requests))
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = {
+                executor.submit(self._translate, text, target_lang, source_lang): (text, source_lang, target_lang)
+                for text, source_lang, target_lang in distinct_requests
+            }
+            try:
+                for future in as_completed(futures):
+                    translation, is_remote = future.result()
+                    if on_translated and is_remote:
+                        on_translated(*futures[future], translation)
+            except Exception as e:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise e
+
+        return [
+            self.translate(text, target_lang, source_lang) for text, source_lang, target_lang in requests
+        ]
@@ -0,0 +1,195 @@
+import logging
+import random
+import threading
+import zlib
+from typing import NamedTuple, Optional
+
+from alexlab_if.alexlab_models import LanguageEnum
+
+logger = logging.getLogger()
+
+TRANSLATION_MEMORY_POLICIES = ["flag", "reuse"]
+
+
+class TranslationMatch(NamedTuple):
+    """
+    A past translation matching a text to translate.
+    """
+    source_text: str
+    translation: str
+    similarity: float
+    is_exact: bool
+
+
+class TranslationMemory:
+    """
+    Past translations indexed by language pair, to reuse them for identical or nearly identical texts.
+
+    Texts are compared by the Jaccard similarity of their character n-grams. To avoid comparing a text with
+    every past one, the n-grams are summarized by MinHash signatures, split into bands, and only the past
+    texts sharing a band with the text are compared (locality-sensitive hashing).
+
+    Identical texts, up to whitespace, are always reused. Nearly identical texts, whose similarity is above
+    the threshold, are either reused or only flagged, depending on the policy: a near match may differ by
+    exactly the word that matters, e.g. an argument.
+
+    Attributes:
+        threshold (float): The similarity from which past translations are near matches.
+        policy (str): Either "flag" to only report near matches, or "reuse" to use their translations.
+        exact_hits (int): The number of translations served from identical texts.
+        reused (int): The number of translations served from near matches.
+        flagged (int): The number of near matches which were reported but translated anyway.
+    """
+
+    # Large prime of the universal hash functions used as permutations
+    PRIME = (1 << 61) - 1
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        policy: str = "flag",
+        ngram_size: int = 3,
+        permutations: int = 64,
+        bands: int = 16,
+    ):
+        """
+        Args:
+            threshold (float, optional): The similarity from which past translations are near matches.
+            policy (str, optional): Either "flag" to only report near matches, or "reuse" to use their translations.
+            ngram_size (int, optional): The number of characters of the n-grams.
+            permutations (int, optional): The length of the MinHash signatures.
+            bands (int, optional): The number of bands the signatures are split into, more bands finding less similar candidates.
+        """
+        if policy not in TRANSLATION_MEMORY_POLICIES:
+            raise ValueError(f"Unknown translation memory policy {policy}")
+        self.threshold = threshold
+        self.policy = policy
+        self.ngram_size = ngram_size
+        self.bands = bands
+        self._rows = permutations // bands
+        rng = random.Random(0)
+        self._permutations = [
+            (rng.randrange(1, self.PRIME), rng.randrange(0, self.PRIME)) for _ in range(self._rows * bands)
+        ]
+        self._lock = threading.Lock()
+        # (normalized text, source_lang, target_lang) -> translation
+        self._exact: dict[tuple[str, LanguageEnum, LanguageEnum], str] = {}
+        # (text, n-grams, translation) of each past translation
+        self._entries: list[tuple[str, frozenset[int], str]] = []
+        # (source_lang, target_lang, band, band of the signature) -> entries
+        self._buckets: dict[tuple, list[int]] = {}
+        self.exact_hits = 0
+        self.reused = 0
+        self.flagged = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.split())
+
+    def ngrams(self, text: str) -> frozenset[int]:
+        text = self.normalize(text).casefold()
+        return frozenset(
+            zlib.crc32(text[i:i + self.ngram_size].encode("utf-8"))
+            for i in range(max(1, len(text) - self.ngram_size + 1))
+        )
+
+    def _signature_bands(self, ngrams: frozenset[int]) -> list[tuple[int, ...]]:
+        signature = [min((a * ngram + b) % self.PRIME for ngram in ngrams) for a, b in self._permutations]
+        return [tuple(signature[band * self._rows:(band + 1) * self._rows]) for band in range(self.bands)]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, text: str, source_lang: LanguageEnum, target_lang: LanguageEnum, translation: str):
+        """
+        Adds a translation to the memory.
+
+        Args:
+            text (str): The source text.
+            source_lang (LanguageEnum): The language of the text.
+            target_lang (LanguageEnum): The language of the translation.
+            translation (str): The translation.
+        """
+        key = (self.normalize(text), source_lang, target_lang)
+        if key in self._exact:
+            return
+        ngrams = self.ngrams(text)
+        signature_bands = self._signature_bands(ngrams)
+
+        with self._lock:
+            if key in self._exact:
+                return
+            self._exact[key] = translation
+            entry = len(self._entries)
+            self._entries.append((text, ngrams, translation))
+            for band, signature_band in enumerate(signature_bands):
+                self._buckets.setdefault((source_lang, target_lang, band, signature_band), []).append(entry)
+
+    def lookup(self, text: str, source_lang: LanguageEnum, target_lang: LanguageEnum) -> Optional[TranslationMatch]:
+        """
+        Finds the most similar past translation of a text.
+
+        Args:
+            text (str): The text to translate.
+            source_lang (LanguageEnum): The language of the text.
+            target_lang (LanguageEnum): The language to translate to.
+
+        Returns:
+            Optional[TranslationMatch]: The identical or most similar past translation above the threshold, if any.
+        """
+        translation = self._exact.get((self.normalize(text), source_lang, target_lang))
+        if translation is not None:
+            return TranslationMatch(text, translation, 1.0, True)
+
+        ngrams = self.ngrams(text)
+        with self._lock:
+            candidates = {
+                entry
+                for band, signature_band in enumerate(self._signature_bands(ngrams))
+                for entry in self._buckets.get((source_lang, target_lang, band, signature_band), ())
+            }
+            entries = [self._entries[entry] for entry in candidates]
+
+        best_match = None
+        for source_text, source_ngrams, translation in entries:
+            similarity = len(ngrams & source_ngrams) / len(ngrams | source_ngrams)
+            if similarity >= self.threshold and (best_match is None or similarity > best_match.similarity):
+                best_match = TranslationMatch(source_text, translation, similarity, False)
+        return best_match
+
+    def accept(self, text: str, match: TranslationMatch) -> bool:
+        """
+        Decides whether a match is used instead of a remote translation, according to the policy.
+
+        Args:
+            text (str): The text to translate.
+            match (TranslationMatch): Its match, as returned by lookup.
+
+        Returns:
+            bool: Whether the translation of the match should be used.
+        """
+        with self._lock:
+            if match.is_exact:
+                self.exact_hits += 1
+                return True
+            if self.policy == "reuse":
+                self.reused += 1
+            else:
+                self.flagged += 1
+        if self.policy == "reuse":
+            logger.info(f"Reusing the translation of {match.source_text!r} for {text!r} ({match.similarity:.2f} similar)")
+            return True
+        logger.warning(f"{text!r} is {match.similarity:.2f} similar to the already translated {match.source_text!r}")
+        return False
+
+    @property
+    def avoided(self) -> int:
+        return self.exact_hits + self.reused
+
+    def report(self):
+        """
+        Prints the translations avoided thanks to the memory.
+        """
+        print("\nTranslation memory")
+        print(f"{len(self)} translations\t{self.exact_hits} exact hits\t{self.reused} near matches reused\t{self.flagged} near matches flagged")
+        print(f"{self.avoided} remote translations avoided")
@@ -1,5 +1,8 @@
+import argparse
 import os 
 import re
+from datetime import datetime
+from functools import lru_cache
 
 from alexlab_if.alexlab_models import CountryEnum, LanguageEnum
 
@@ -28,6 +31,15 @@ def trailing_platform_slug(slug, platform):
     return "__".join([slug, platform])
 
 
+@lru_cache(maxsize=4096)
+def parse_rev_date(rev_date: str) -> datetime:
+    """ Parses a revision date, assuming UTC."""
+    from dateutil import tz
+    from dateutil.parser import parse as parsedate
+
+    return parsedate(rev_date).replace(tzinfo=tz.gettz("UTC"))
+
+
 def shorten(string: str):
     return string[:1]
 
@@ -39,3 +51,23 @@ def country_language_pairs(arg):
     # encounter a problem.
     [country, language] = arg.split(':')
     return (CountryEnum(country),LanguageEnum(language))
+
+
+def positive_int(arg):
+    value = int(arg)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"Expected a positive integer, got {arg}")
+    return value
+
+
+def translation_endpoint(arg):
+    # A HuggingFace Space or URL, optionally followed by
+    # its weight, e.g. localhost:7860=2
+    src, _, weight = arg.rpartition('=')
+    try:
+        src, weight = (src, float(weight)) if src else (arg, 1.0)
+    except ValueError:
+        return (arg, 1.0)
+    if weight <= 0:
+        raise argparse.ArgumentTypeError(f"The weight of {src} must be positive, got {weight:g}")
+    return (src, weight)
@@ -0,0 +1,196 @@
+import logging
+import os
+import time
+
+from alexlab_if.action_stream import iter_actions
+from alexlab_if.alexlab_models import AlexlabTemplate, ArgumentIndex, DiffStatus
+from alexlab_if.existing_actions import apply_actions, build_slug_index, latest_rev_records, load_existing_actions, save_actions, translation_cache_entries, written_records
+from alexlab_if.template_rendering import load_arguments_from_csv, load_templates_from_csv
+from alexlab_if.translation import TranslationService
+from alexlab_if.utils import trailing_platform_slug
+
+logger = logging.getLogger()
+
+
+def changed_placeholders(previous: ArgumentIndex, current: ArgumentIndex) -> set[str]:
+    """
+    Compares two versions of the arguments, placeholder by placeholder.
+
+    Args:
+        previous (ArgumentIndex): The arguments before the change.
+        current (ArgumentIndex): The arguments after the change.
+
+    Returns:
+        set: The placeholders whose argument rows were added, removed or edited.
+    """
+    return {
+        placeholder
+        for placeholder in set(previous) | set(current)
+        if placeholder not in previous or placeholder not in current or previous[placeholder] != current[placeholder]
+    }
+
+
+def affected_templates(
+    previous_templates: list[AlexlabTemplate],
+    templates: list[AlexlabTemplate],
+    placeholders: set[str],
+) -> list[AlexlabTemplate]:
+    """
+    Finds the templates to regenerate after a change of the input files.
+
+    Args:
+        previous_templates (list[AlexlabTemplate]): The templates before the change.
+        templates (list[AlexlabTemplate]): The templates after the change.
+        placeholders (set[str]): The placeholders whose arguments changed.
+
+    Returns:
+        list: The new or edited templates, and the templates using a changed placeholder.
+    """
+    previous_fingerprints = {template.name: template.fingerprint for template in previous_templates}
+    return [
+        template for template in templates
+        if previous_fingerprints.get(template.name) != template.fingerprint
+        or placeholders.intersection(template.placeholders)
+    ]
+
+
+def watch_templates(
+    output_path: str = None,
+    should_translate: bool = True,
+    extra_country_languages = [],
+    input_template_path: str = None,
+    input_argument_path: str = None,
+    dry_run: bool = False,
+    translation_service: TranslationService = None,
+    warm_translation_cache: bool = True,
+    translation_strategy: str = "full",
+    poll_interval: float = 2.0,
+):
+    """
+    Generates the user actions, then regenerates them each time the input files change, until interrupted.
+
+    The translation service and its cache, the arguments and the index of the existing actions are kept
+    in memory between changes, and only the templates whose row changed, or whose placeholder had its
+    argument rows changed, are rendered, diffed, translated and written again.
+
+    The templates whose regeneration failed are retried at every check until they succeed. As in a regular
+    run, removing a template or an argument leaves the actions generated from it as they are.
+
+    The output file is expected to only be modified by this process while it is watching.
+
+    Args:
+        output_path (str, optional): The path which might contain the existing list of actions and where to save the updated list as a CSV file.
+        should_translate (bool, optional): Whether to translate the interpolations.
+        extra_country_languages (list, optional): Additional country-language pairs.
+        input_template_path (str, optional): The path to the input template CSV file.
+        input_argument_path (str, optional): The path to the input argument CSV file.
+        dry_run (bool, optional): Whether to only report the changes, without translating nor saving them.
+        translation_service (TranslationService, optional): The service to use for translations.
+        warm_translation_cache (bool, optional): Whether to reuse the translations found in the existing list of actions.
+        translation_strategy (str, optional): Either "full" or "skeleton", see translate_interpolations.
+        poll_interval (float, optional): The number of seconds between two checks of the input files.
+    """
+    ts = translation_service
+
+    def modification_times():
+        return os.stat(input_template_path).st_mtime_ns, os.stat(input_argument_path).st_mtime_ns
+
+    output_df = load_existing_actions(output_path)
+    existing_action_records = latest_rev_records(output_df)
+    existing_slugs = build_slug_index(existing_action_records)
+    print(f"Found {len(existing_slugs)} existing records")
+
+    if warm_translation_cache and should_translate and ts and not dry_run:
+        warmed = ts.warm_cache(translation_cache_entries(existing_action_records))
+        print(f"Warmed translation cache with {warmed} existing translations")
+    del existing_action_records
+
+    if should_translate and ts and len(ts.endpoints) > 1 and not dry_run:
+        ts.check_health()
+
+    def regenerate(templates: list[AlexlabTemplate], arguments: ArgumentIndex):
+        nonlocal output_df, existing_slugs
+
+        actions = []
+        for action in iter_actions(
+            templates=templates,
+            arguments=arguments,
+            existing_index=existing_slugs,
+            extra_country_languages=extra_country_languages,
+            translation_service=ts,
+            should_translate=should_translate and not dry_run,
+            report=True,
+            translation_strategy=translation_strategy,
+        ):
+            if action.diff_status in (DiffStatus.new, DiffStatus.upd) and not dry_run:
+                print(
+                    f"Adding {trailing_platform_slug(action.slug, action.platform)}",
+                )
+            actions.append(action)
+
+        if dry_run or not actions:
+            return
+
+        existing_records = len(output_df)
+        output_df = apply_actions(output_df, actions)
+        save_actions(output_df, output_path)
+
+        # Only the records written or modified by this change are added to the index
+        existing_slugs = existing_slugs.extend(written_records(output_df, actions, existing_records))
+        print(f"Updated {output_path} with {len(actions)} actions")
+
+    last_modification_times = modification_times()
+    templates = load_templates_from_csv(input_template_path)
+    arguments = load_arguments_from_csv(input_argument_path)
+    regenerate(templates, arguments)
+
+    print(f"\nWatching {input_template_path} and {input_argument_path} for changes, press Ctrl+C to stop")
+    # Names of the templates whose regeneration failed, retried at every check until they succeed
+    failed_templates = set()
+    try:
+        while True:
+            time.sleep(poll_interval)
+            try:
+                current_modification_times = modification_times()
+            except FileNotFoundError:
+                # Editors may replace the file instead of writing it in place
+                continue
+
+            if current_modification_times == last_modification_times:
+                if not failed_templates:
+                    continue
+                templates_to_regenerate = [template for template in templates if template.name in failed_templates]
+                print(f"\nRetrying {len(templates_to_regenerate)} templates")
+
+            else:
+                last_modification_times = current_modification_times
+                try:
+                    current_templates = load_templates_from_csv(input_template_path)
+                    current_arguments = load_arguments_from_csv(input_argument_path)
+                except Exception as e:
+                    logger.error(f"Could not load the input files, waiting for the next change: {e}")
+                    continue
+
+                placeholders = changed_placeholders(arguments, current_arguments)
+                templates_to_regenerate = affected_templates(templates, current_templates, placeholders)
+                templates_to_regenerate += [
+                    template for template in current_templates
+                    if template.name in failed_templates and template not in templates_to_regenerate
+                ]
+                removed_templates = {template.name for template in templates} - {template.name for template in current_templates}
+                templates, arguments = current_templates, current_arguments
+
+                print(
+                    f"\nInput files changed: {len(templates_to_regenerate)} templates affected"
+                    + (f", arguments changed for {', '.join(sorted(placeholders))}" if placeholders else "")
+                    + (f", {', '.join(sorted(removed_templates))} removed and their actions kept" if removed_templates else "")
+                )
+
+            try:
+                regenerate(templates_to_regenerate, arguments)
+                failed_templates = set()
+            except Exception as e:
+                failed_templates = {template.name for template in templates_to_regenerate}
+                logger.error(f"ERROR: {e}, the affected templates will be retried in {poll_interval:g}s")
+    except KeyboardInterrupt:
+        print("\nStopped watching")
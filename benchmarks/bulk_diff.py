@@ -0,0 +1,113 @@
+"""
+Checks that the vectorised diff of the candidate actions against the existing ones classifies
+a synthetic corpus exactly like the former per-record loop, and compares their speed.
+
+The corpus mixes unchanged, metadata-only, updated and new candidates, along with
+existing records without a fingerprint and duplicated slugs.
+
+Usage:
+    python -m benchmarks.bulk_diff [--records 200000]
+"""
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from alexlab_if.alexlab_models import DiffStatus
+from alexlab_if.bulk_diff import CANDIDATE_COLUMNS, bulk_diff
+from alexlab_if.existing_actions import classify_existing
+from alexlab_if.slug_table import SlugTable
+from alexlab_if.utils import trailing_platform_slug
+
+from benchmarks.slug_index_memory import synthetic_records
+
+
+def synthetic_candidates(existing_action_records: pd.DataFrame) -> pd.DataFrame:
+    """
+    Derives candidate actions from the existing records, with every kind of change.
+
+    Args:
+        existing_action_records (DataFrame): The existing records.
+
+    Returns:
+        DataFrame: The candidate actions, with the CANDIDATE_COLUMNS.
+    """
+    rng = random.Random(1)
+    rows = []
+    for slug, platform, rev_date, fingerprint in existing_action_records[CANDIDATE_COLUMNS].itertuples(index=False):
+        change = rng.random()
+        if change < 0.1:
+            rev_date = "2024-09-01 9:00"
+        elif change < 0.2:
+            fingerprint = f"{rng.getrandbits(64):016x}"
+        elif change < 0.25:
+            rev_date, fingerprint = "2024-09-01 9:00", f"{rng.getrandbits(64):016x}"
+        elif change < 0.35:
+            slug = f"{slug}-new"
+        rows.append((slug, platform, rev_date, fingerprint if isinstance(fingerprint, str) else f"{rng.getrandbits(64):016x}"))
+    return pd.DataFrame(rows, columns=CANDIDATE_COLUMNS)
+
+
+def loop_diff(candidates: pd.DataFrame, existing_index: SlugTable) -> list[DiffStatus]:
+    # The former classification: one lookup and one classification per candidate
+    rows = existing_index.find_many([
+        trailing_platform_slug(slug, platform)
+        for slug, platform in zip(candidates["slug"], candidates["platform"])
+    ])
+    return [
+        DiffStatus.new if row is None else classify_existing(existing_index.record(row), rev_date, fingerprint)
+        for row, rev_date, fingerprint in zip(rows, candidates["rev_date"], candidates["fingerprint"])
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--records", type=int, default=200_000
+    )
+    args = parser.parse_args()
+
+    existing_action_records = synthetic_records(args.records)
+    # Some records predate fingerprints, and some slugs are duplicated
+    existing_action_records.loc[existing_action_records.index % 7 == 0, "fingerprint"] = None
+    existing_action_records = pd.concat(
+        [existing_action_records, existing_action_records.iloc[::50].assign(rev_date="2024-07-01 9:00")],
+        ignore_index=True,
+    )
+    existing_index = SlugTable(existing_action_records)
+    candidates = synthetic_candidates(existing_action_records)
+
+    start = time.perf_counter()
+    expected = loop_diff(candidates, existing_index)
+    loop_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    diff = bulk_diff(candidates, existing_index)
+    bulk_elapsed = time.perf_counter() - start
+
+    statuses = diff.statuses().tolist()
+    mismatches = sum(status != expected_status for status, expected_status in zip(statuses, expected))
+    expected_outdated_ids = existing_index.ids[
+        [existing_index.find(trailing_platform_slug(slug, platform)) for slug, platform, status in zip(
+            candidates["slug"], candidates["platform"], expected
+        ) if status == DiffStatus.upd]
+    ]
+
+    print(f"{len(candidates)} candidates against {existing_index.records} records\n")
+    print(f"Status\tCount")
+    for diff_status in DiffStatus:
+        print(f"{diff_status.name}\t{int(getattr(diff, diff_status.name).sum())}")
+    print(f"\nLoop\t{loop_elapsed:.2f}s")
+    print(f"Bulk\t{bulk_elapsed:.2f}s")
+
+    if mismatches or not np.array_equal(diff.outdated_ids, expected_outdated_ids):
+        print(f"\n{mismatches} candidates are classified differently from the loop")
+        sys.exit(1)
+    print("\nSame classification as the loop")
+
+
+if __name__ == "__main__":
+    main()
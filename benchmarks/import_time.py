@@ -0,0 +1,90 @@
+"""
+Measures the import time of the package with `python -X importtime` and fails
+if it regresses, either because a heavy dependency is imported eagerly again or
+because the cumulative import time exceeds the budget.
+
+The package keeps its start-up fast by importing the HEAVY_MODULES inside the
+functions which need them, under TYPE_CHECKING for the annotations.
+
+Usage:
+    python -m benchmarks.import_time [--budget-ms 150] [--repeat 5]
+"""
+import argparse
+import subprocess
+import sys
+
+# Dependencies which must only be imported on the code paths that need them
+HEAVY_MODULES = [
+    "pandas",
+    "numpy",
+    "tqdm",
+    "dateutil",
+    "gradio_client",
+    "httpx",
+    "yake",
+    "jinja2",
+    "aenum",
+]
+
+
+def measure_import_time(statement: str) -> dict[str, int]:
+    """
+    Runs the statement in a fresh interpreter with -X importtime.
+
+    Args:
+        statement (str): The Python statement to run.
+
+    Returns:
+        dict: The cumulative import time of each imported module, in microseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        cumulative_times[module.strip()] = int(cumulative)
+    return cumulative_times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--statement", type=str, default="import alexlab_if"
+    )
+    parser.add_argument(
+        "--budget-ms", type=float, default=150, help='Maximum cumulative import time of the package'
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help='Number of measurements, the fastest one is kept'
+    )
+    args = parser.parse_args()
+
+    measurements = [measure_import_time(args.statement) for _ in range(args.repeat)]
+    fastest = min(measurements, key=lambda times: times.get("alexlab_if", 0))
+    package_ms = fastest.get("alexlab_if", 0) / 1000
+
+    print(f"Cumulative import time of alexlab_if: {package_ms:.1f}ms (budget {args.budget_ms:.1f}ms)")
+    print("\nSlowest imports")
+    for module, cumulative in sorted(fastest.items(), key=lambda item: -item[1])[:10]:
+        print(f"{cumulative / 1000:.1f}ms\t{module}")
+
+    regressions = [
+        module for module in HEAVY_MODULES
+        if module in fastest
+    ]
+    if regressions:
+        print(f"\nFAIL: heavy modules imported eagerly: {', '.join(regressions)}")
+    if package_ms > args.budget_ms:
+        print(f"\nFAIL: import time exceeds the budget")
+
+    sys.exit(1 if regressions or package_ms > args.budget_ms else 0)
+
+
+if __name__ == "__main__":
+    main()
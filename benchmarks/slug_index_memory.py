@@ -0,0 +1,115 @@
+"""
+Compares the memory used by the slug index of the existing actions when built as a
+dictionary of concatenated slugs and as a compact SlugTable, on a synthetic history.
+
+Usage:
+    python -m benchmarks.slug_index_memory [--records 1000000]
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+import pandas as pd
+
+from alexlab_if.slug_table import SlugTable
+from alexlab_if.utils import trailing_platform_slug
+
+PLATFORMS = ["tiktok", "youtube", "copilot", "gemini"]
+COUNTRIES = ["de", "fr", "it", "es", "nl", "pl"]
+
+
+def synthetic_records(records: int) -> pd.DataFrame:
+    """
+    Generates the latest revision records of a synthetic history.
+
+    Args:
+        records (int): The number of records.
+
+    Returns:
+        DataFrame: The records.
+    """
+    rng = random.Random(0)
+    rows = []
+    for i in range(records):
+        country = rng.choice(COUNTRIES)
+        rows.append(dict(
+            slug=f"template{i // 2000}__{country}__{rng.choice([country, 'en'])}__argument-number-{i % 2000}",
+            platform=PLATFORMS[i % len(PLATFORMS)],
+            rev_date=f"2024-08-{1 + i % 28:02d} 9:00",
+            fingerprint=f"{rng.getrandbits(64):016x}",
+        ))
+    return pd.DataFrame(rows)
+
+
+def dict_index(existing_action_records: pd.DataFrame) -> dict[str, dict]:
+    # The former index: one concatenated slug and one small dictionary per record
+    return {
+        trailing_platform_slug(slug, platform): {
+            "id": index,
+            "rev_date": rev_date,
+            "fingerprint": fingerprint,
+        }
+        for index, slug, platform, rev_date, fingerprint in zip(
+            existing_action_records.index,
+            existing_action_records["slug"],
+            existing_action_records["platform"],
+            existing_action_records["rev_date"],
+            existing_action_records["fingerprint"],
+        )
+    }
+
+
+def measure(build, existing_action_records: pd.DataFrame):
+    """
+    Measures the memory retained by an index and the time to build it.
+
+    Returns:
+        tuple: The index, the retained and peak memory in bytes, and the build time in seconds.
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    index = build(existing_action_records)
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return index, retained, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--records", type=int, default=1_000_000
+    )
+    parser.add_argument(
+        "--lookups", type=int, default=10_000
+    )
+    args = parser.parse_args()
+
+    existing_action_records = synthetic_records(args.records)
+    candidates = [
+        trailing_platform_slug(slug, platform)
+        for slug, platform in existing_action_records[["slug", "platform"]].sample(min(args.lookups, len(existing_action_records)), random_state=0).itertuples(index=False)
+    ]
+
+    print(f"{args.records} records\n")
+    print(f"Index\tRetained\tPeak\tBuild\tLookup")
+    for name, build in [("dict", dict_index), ("SlugTable", SlugTable)]:
+        index, retained, peak, elapsed = measure(build, existing_action_records)
+
+        start = time.perf_counter()
+        # The diff looks up all the slugs of a template at once
+        if isinstance(index, SlugTable):
+            assert None not in index.find_many(candidates)
+        else:
+            assert all(candidate in index for candidate in candidates)
+        lookup = (time.perf_counter() - start) / len(candidates)
+
+        print(f"{name}\t{retained / 2**20:.1f}MiB\t{peak / 2**20:.1f}MiB\t{elapsed:.2f}s\t{lookup * 1e6:.1f}µs")
+        del index
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import csv
+
+import pytest
+
+from alexlab_if.alexlab_models import AlexlabTemplate, AlexlabVariable, ArgumentIndex, CountryEnum, LanguageEnum, PlaceholderArgument
+from alexlab_if.template_rendering import template_from_row
+from alexlab_if.translation import TranslationService
+
+TEMPLATE_COLUMNS = [
+    "template_slug", "values", "target_countries", "language", "target_languages", "target_platforms",
+    "status", "experiment_slug", "priority", "notes", "rev_date", "min_samples",
+]
+
+ARGUMENT_COLUMNS = ["value", "placeholder", "target_countries", "status"]
+
+
+def template_row(**cells) -> dict:
+    """
+    Builds a row of the templates CSV file, with defaults for the cells which aren't given.
+    """
+    return {
+        "template_slug": "template",
+        "values": "What are the main challenges faced by {INDUSTRY}?",
+        "target_countries": "fr,de",
+        "language": "en",
+        "target_languages": "fr,de",
+        "target_platforms": "copilot,youtube",
+        "status": "draft",
+        "experiment_slug": "experiment",
+        "priority": "",
+        "notes": "",
+        "rev_date": "2024-08-05 9:00",
+        "min_samples": "",
+        **cells,
+    }
+
+
+def make_template(**cells) -> AlexlabTemplate:
+    return template_from_row(template_row(**cells))
+
+
+def argument_row(value: str, placeholder: str = "INDUSTRY", target_countries: str = "fr,de", status: str = "draft") -> dict:
+    return {"value": value, "placeholder": placeholder, "target_countries": target_countries, "status": status}
+
+
+def make_arguments(*rows: dict) -> ArgumentIndex:
+    """
+    Builds the argument index of argument rows, grouped by placeholder as load_arguments_from_csv does.
+    """
+    arguments_by_placeholder: dict[str, list[PlaceholderArgument]] = {}
+    for row in rows:
+        arguments_by_placeholder.setdefault(row["placeholder"].lower(), []).append(PlaceholderArgument(
+            value=row["value"],
+            countries=[CountryEnum(country) for country in row["target_countries"].split(",")],
+            status=row["status"],
+        ))
+    return ArgumentIndex(
+        AlexlabVariable(placeholder=placeholder, arguments=arguments)
+        for placeholder, arguments in arguments_by_placeholder.items()
+    )
+
+
+def write_csv(path, columns: list[str], rows: list[dict]) -> str:
+    with open(path, "wt", newline="") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+class FakeTranslationService(TranslationService):
+    """
+    A translation service which tags the texts with their target language instead of translating them remotely.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__("fake/translation", None, **kwargs)
+        self.requested: list[tuple[str, LanguageEnum, LanguageEnum]] = []
+
+    def _remote_translate(self, text: str, target_lang: LanguageEnum, source_lang=LanguageEnum.en):
+        with self._lock:
+            self.requested.append((text, source_lang, target_lang))
+        return f"[{target_lang.value}] {text}"
+
+
+@pytest.fixture
+def translation_service() -> FakeTranslationService:
+    return FakeTranslationService()
+
+
+@pytest.fixture
+def input_files(tmp_path):
+    """
+    Writes templates and arguments CSV files, returning their paths along with the path of the output file.
+    """
+    def write(template_rows: list[dict], argument_rows: list[dict]) -> tuple[str, str, str]:
+        return (
+            write_csv(tmp_path / "templates.csv", TEMPLATE_COLUMNS, template_rows),
+            write_csv(tmp_path / "arguments.csv", ARGUMENT_COLUMNS, argument_rows),
+            str(tmp_path / "actions.csv"),
+        )
+    return write
@@ -0,0 +1,67 @@
+import pandas as pd
+
+from alexlab_if import action_stream
+from alexlab_if.ActionDataFrame import ActionDataFrame
+from alexlab_if.action_stream import diff_interpolations, iter_actions
+from alexlab_if.alexlab_models import DiffStatus
+from alexlab_if.existing_actions import apply_actions, build_slug_index, latest_rev_records
+from alexlab_if.template_rendering import interpolate_template_and_arguments
+
+from conftest import argument_row, make_arguments, make_template
+
+ARGUMENTS = make_arguments(*[argument_row(f"Industry {i}") for i in range(50)])
+
+
+def test_actions_are_rendered_one_batch_at_a_time(monkeypatch):
+    template = make_template()
+    diffed = []
+
+    def counting_diff_interpolations(template, interpolations, existing_index):
+        diffed.append(len(interpolations))
+        return diff_interpolations(template, interpolations, existing_index)
+
+    monkeypatch.setattr(action_stream, "diff_interpolations", counting_diff_interpolations)
+    actions = iter_actions(
+        [template], ARGUMENTS, build_slug_index(ActionDataFrame()), should_translate=False, batch_size=10
+    )
+
+    next(actions)
+    assert diffed == [10]
+
+    rest = list(actions)
+    # 50 arguments x 2 countries, on 2 platforms
+    assert len(rest) + 1 == 200
+    assert diffed == [10] * 10
+
+
+def test_apply_actions_leaves_the_existing_actions_untouched():
+    template = make_template()
+    first = apply_actions(
+        ActionDataFrame(), list(iter_actions([template], ARGUMENTS, build_slug_index(ActionDataFrame()), should_translate=False))
+    )
+    snapshot = first.copy()
+
+    changed = make_template(values="What are the latest news about {INDUSTRY}?", rev_date="2024-09-01 9:00")
+    bumped = make_template(rev_date="2024-09-01 9:00")
+    existing_index = build_slug_index(latest_rev_records(first))
+    actions = [
+        *list(iter_actions([changed], ARGUMENTS, existing_index, should_translate=False))[:4],
+        *list(iter_actions([bumped], ARGUMENTS, existing_index, should_translate=False))[4:8],
+    ]
+    assert [action.diff_status for action in actions] == [DiffStatus.upd] * 4 + [DiffStatus.meta] * 4
+
+    updated = apply_actions(first, actions)
+
+    pd.testing.assert_frame_equal(first, snapshot)
+    assert len(updated) == len(first) + 4
+    assert updated["is_latest_rev"].tolist().count(False) == 4
+    assert (updated.loc[[action.existing_record_id for action in actions[4:]], "rev_date"] == "2024-09-01 9:00").all()
+    # The outdated and bumped records are the ones the actions refer to
+    assert not updated.loc[[action.existing_record_id for action in actions[:4]], "is_latest_rev"].any()
+
+
+def test_interpolate_template_and_arguments_renders_everything():
+    interpolations = interpolate_template_and_arguments(make_template(), ARGUMENTS, report=False)
+
+    assert len(interpolations) == 100
+    assert interpolations[0].text == "What are the main challenges faced by Industry 0?"
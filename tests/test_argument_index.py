@@ -0,0 +1,51 @@
+import pytest
+
+from alexlab_if.alexlab_models import ArgumentIndex, CountryEnum
+from alexlab_if.template_rendering import interpolate_template_and_arguments, load_arguments_from_csv
+
+from conftest import ARGUMENT_COLUMNS, argument_row, make_template, write_csv
+
+
+@pytest.fixture
+def arguments(tmp_path) -> ArgumentIndex:
+    return load_arguments_from_csv(write_csv(tmp_path / "arguments.csv", ARGUMENT_COLUMNS, [
+        argument_row("Robotics", target_countries="de"),
+        argument_row("Crypto", placeholder="TOPIC", target_countries="fr"),
+        argument_row("Blockchain", target_countries="fr,de"),
+        argument_row("Gaming", target_countries="fr", status="discarded"),
+        argument_row("Artificial Intelligence", target_countries="fr"),
+    ]))
+
+
+def test_arguments_keep_the_order_of_the_file(arguments):
+    assert list(arguments) == ["industry", "topic"]
+    assert [argument.value for argument in arguments["industry"].arguments] == [
+        "Robotics", "Blockchain", "Gaming", "Artificial Intelligence",
+    ]
+
+    by_country = arguments.arguments_by_country("industry")
+    assert list(by_country) == [CountryEnum.de, CountryEnum.fr]
+    assert [argument.value for argument in by_country[CountryEnum.de]] == ["Robotics", "Blockchain"]
+    # Discarded arguments are left out
+    assert [argument.value for argument in by_country[CountryEnum.fr]] == ["Blockchain", "Artificial Intelligence"]
+    assert by_country[CountryEnum.fr][1].slug == "artificial-intelligence"
+
+
+def test_index_is_read_only(arguments):
+    with pytest.raises(TypeError):
+        arguments.arguments_by_country("industry")[CountryEnum.it] = ()
+    with pytest.raises(TypeError):
+        arguments._variables["industry"] = None
+
+
+def test_interpolations_follow_the_order_of_the_arguments(arguments):
+    interpolations = interpolate_template_and_arguments(
+        make_template(target_countries="fr,de", target_languages="fr,de"), arguments, report=False
+    )
+
+    assert [(interpolation.country, interpolation.arguments[0]) for interpolation in interpolations] == [
+        (CountryEnum.fr, "Blockchain"),
+        (CountryEnum.fr, "Artificial Intelligence"),
+        (CountryEnum.de, "Robotics"),
+        (CountryEnum.de, "Blockchain"),
+    ]
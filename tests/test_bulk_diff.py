@@ -0,0 +1,55 @@
+import pandas as pd
+
+from alexlab_if.alexlab_models import DiffStatus
+from alexlab_if.bulk_diff import CANDIDATE_COLUMNS, bulk_diff
+from alexlab_if.slug_table import SlugTable
+
+from benchmarks.bulk_diff import loop_diff, synthetic_candidates
+from benchmarks.slug_index_memory import synthetic_records
+
+ZERO_FINGERPRINT = "0" * 16
+
+
+def test_bulk_diff_classifies_like_the_loop():
+    existing_action_records = synthetic_records(5000)
+    # Some records predate fingerprints, and some slugs are duplicated
+    existing_action_records.loc[existing_action_records.index % 7 == 0, "fingerprint"] = None
+    existing_action_records = pd.concat(
+        [existing_action_records, existing_action_records.iloc[::50].assign(rev_date="2024-07-01 9:00")],
+        ignore_index=True,
+    )
+    existing_index = SlugTable(existing_action_records)
+    candidates = synthetic_candidates(existing_action_records)
+
+    diff = bulk_diff(candidates, existing_index)
+
+    expected = loop_diff(candidates, existing_index)
+    assert diff.statuses().tolist() == expected
+    assert {DiffStatus.new, DiffStatus.dup, DiffStatus.upd, DiffStatus.meta} == set(expected)
+
+
+def test_a_zero_fingerprint_isnt_a_missing_one():
+    existing_action_records = pd.DataFrame([
+        ("a__fr__fr__blockchain", "copilot", "2024-08-05 9:00", ZERO_FINGERPRINT),
+        ("b__fr__fr__blockchain", "copilot", "2024-08-05 9:00", None),
+        ("c__fr__fr__blockchain", "copilot", "2024-08-05 9:00", "00000000000000ff"),
+    ], columns=CANDIDATE_COLUMNS)
+    existing_index = SlugTable(existing_action_records)
+    candidates = pd.DataFrame([
+        # Content changed from a zero fingerprint
+        ("a__fr__fr__blockchain", "copilot", "2024-08-05 9:00", "00000000000000ff"),
+        # Only the revision date of a zero fingerprint changed
+        ("a__fr__fr__blockchain", "copilot", "2024-09-01 9:00", ZERO_FINGERPRINT),
+        # Without a fingerprint, only the revision date is compared
+        ("b__fr__fr__blockchain", "copilot", "2024-08-05 9:00", ZERO_FINGERPRINT),
+        ("b__fr__fr__blockchain", "copilot", "2024-09-01 9:00", ZERO_FINGERPRINT),
+        # Content changed to a zero fingerprint
+        ("c__fr__fr__blockchain", "copilot", "2024-08-05 9:00", ZERO_FINGERPRINT),
+    ], columns=CANDIDATE_COLUMNS)
+
+    diff = bulk_diff(candidates, existing_index)
+
+    expected = [DiffStatus.upd, DiffStatus.meta, DiffStatus.dup, DiffStatus.upd, DiffStatus.upd]
+    assert loop_diff(candidates, existing_index) == expected
+    assert diff.statuses().tolist() == expected
+    assert diff.outdated_ids.tolist() == [0, 1, 2]
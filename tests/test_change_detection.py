@@ -0,0 +1,67 @@
+import pandas as pd
+
+from alexlab_if.alexlab_models import AlexlabInterpolation, DiffStatus, LanguageEnum
+from alexlab_if.existing_actions import classify_existing
+from alexlab_if.interpolate_templates import interpolate_templates
+
+from conftest import argument_row, template_row
+
+FINGERPRINT = AlexlabInterpolation.make_fingerprint("{{industry}}?", LanguageEnum.en, LanguageEnum.fr, ["Blockchain"])
+
+
+def test_fingerprint_covers_the_content():
+    assert FINGERPRINT == AlexlabInterpolation.make_fingerprint("{{industry}}?", LanguageEnum.en, LanguageEnum.fr, ["Blockchain"])
+    assert len(FINGERPRINT) == 16
+    assert FINGERPRINT != AlexlabInterpolation.make_fingerprint("{{industry}}!", LanguageEnum.en, LanguageEnum.fr, ["Blockchain"])
+    assert FINGERPRINT != AlexlabInterpolation.make_fingerprint("{{industry}}?", LanguageEnum.en, LanguageEnum.de, ["Blockchain"])
+    assert FINGERPRINT != AlexlabInterpolation.make_fingerprint("{{industry}}?", LanguageEnum.en, LanguageEnum.fr, ["Robotics"])
+
+
+def test_classify_existing():
+    existing_record = {"id": 0, "rev_date": "2024-08-05 9:00", "fingerprint": FINGERPRINT}
+
+    assert classify_existing(existing_record, "2024-08-05 09:00:00", FINGERPRINT) == DiffStatus.dup
+    assert classify_existing(existing_record, "2024-09-01 9:00", FINGERPRINT) == DiffStatus.meta
+    assert classify_existing(existing_record, "2024-08-05 9:00", "0" * 16) == DiffStatus.upd
+    assert classify_existing(existing_record, "2024-09-01 9:00", "0" * 16) == DiffStatus.upd
+
+
+def test_classify_existing_without_fingerprint():
+    # Records written before fingerprints were introduced are compared by revision date only
+    existing_record = {"id": 0, "rev_date": "2024-08-05 9:00", "fingerprint": None}
+
+    assert classify_existing(existing_record, "2024-08-05 9:00", FINGERPRINT) == DiffStatus.dup
+    assert classify_existing(existing_record, "2024-09-01 9:00", FINGERPRINT) == DiffStatus.upd
+
+
+def test_runs_apply_meta_and_upd(input_files, translation_service):
+    arguments = [argument_row("Blockchain", target_countries="fr")]
+    template = dict(target_countries="fr", target_languages="fr", target_platforms="copilot")
+
+    def run(**cells) -> pd.DataFrame:
+        template_path, argument_path, output_path = input_files([template_row(**template, **cells)], arguments)
+        interpolate_templates(
+            output_path=output_path,
+            input_template_path=template_path,
+            input_argument_path=argument_path,
+            dry_run=False,
+            translation_service=translation_service,
+        )
+        return pd.read_csv(output_path)
+
+    first = run()
+    assert len(first) == 1
+
+    # Only the revision date changed: the record gets it, without being regenerated
+    meta = run(rev_date="2024-09-01 9:00")
+    assert len(meta) == 1
+    assert meta.loc[0, "rev_date"] == "2024-09-01 9:00"
+    assert meta.loc[0, "values"] == first.loc[0, "values"]
+    assert len(translation_service.requested) == 1
+
+    # The content changed: the record is outdated by a new one
+    upd = run(rev_date="2024-09-01 9:00", values="What are the latest news about {INDUSTRY}?")
+    assert len(upd) == 2
+    assert upd["is_latest_rev"].tolist() == [False, True]
+    assert upd.loc[0, "fingerprint"] != upd.loc[1, "fingerprint"]
+    assert upd.loc[1, "values"] == "[fr] What are the latest news about Blockchain?"
@@ -0,0 +1,89 @@
+from collections import Counter
+
+import pandas as pd
+
+from alexlab_if.action_stream import iter_actions
+from alexlab_if.alexlab_models import AlexlabInterpolation
+from alexlab_if.estimation import estimate_templates
+from alexlab_if.existing_actions import build_slug_index, latest_rev_records, load_existing_actions
+from alexlab_if.interpolate_templates import interpolate_templates
+from alexlab_if.template_rendering import load_arguments_from_csv, load_templates_from_csv
+
+from conftest import TEMPLATE_COLUMNS, argument_row, template_row, write_csv
+
+TEMPLATES = [
+    template_row(template_slug="news", values="What are the latest news?", target_countries="fr,de", target_languages="fr,de"),
+    template_row(template_slug="challenges", target_languages="en,fr,de"),
+]
+
+ARGUMENTS = [
+    argument_row("Blockchain", target_countries="fr,de"),
+    argument_row("Robotics", target_countries="de"),
+    argument_row("Gaming", target_countries="fr", status="discarded"),
+]
+
+
+def rendered_counts(template_path: str, argument_path: str, output_path: str) -> Counter:
+    actions = iter_actions(
+        templates=load_templates_from_csv(template_path),
+        arguments=load_arguments_from_csv(argument_path),
+        existing_index=build_slug_index(latest_rev_records(load_existing_actions(output_path))),
+        should_translate=False,
+        include_dup=True,
+    )
+    return Counter(action.diff_status.name for action in actions)
+
+
+def test_estimate_matches_rendering(input_files, translation_service):
+    template_path, argument_path, output_path = input_files(TEMPLATES, ARGUMENTS)
+    paths = dict(input_template_path=template_path, input_argument_path=argument_path, output_path=output_path)
+
+    estimate = estimate_templates(**paths)
+    assert estimate["new"] == rendered_counts(template_path, argument_path, output_path)["new"] == 16
+    # Every interpolation targets two platforms
+    assert estimate["total"] * 2 == estimate["new"]
+
+    interpolate_templates(**paths, dry_run=False, translation_service=translation_service)
+
+    estimate = estimate_templates(**paths)
+    assert estimate["dup"] == rendered_counts(template_path, argument_path, output_path)["dup"] == 16
+    assert estimate["new"] == estimate["upd"] == estimate["meta"] == 0
+
+
+def test_estimate_counts_repeated_arguments_as_often_as_a_run(input_files, translation_service):
+    # The same argument listed twice renders the same interpolation twice, under the same slug
+    template_path, argument_path, output_path = input_files(
+        [template_row(target_countries="de", target_languages="de")],
+        [argument_row("Blockchain", target_countries="de"), argument_row("Blockchain", target_countries="de")],
+    )
+    paths = dict(input_template_path=template_path, input_argument_path=argument_path, output_path=output_path)
+
+    estimate = estimate_templates(**paths)
+
+    assert estimate["total"] == 2
+    assert estimate["new"] == rendered_counts(template_path, argument_path, output_path)["new"] == 4
+
+    interpolate_templates(**paths, dry_run=False, translation_service=translation_service)
+    assert len(pd.read_csv(output_path)) == 4
+
+
+def test_estimate_only_fingerprints_existing_candidates(monkeypatch, input_files, translation_service):
+    template_path, argument_path, output_path = input_files(TEMPLATES[:1], ARGUMENTS)
+    paths = dict(input_template_path=template_path, input_argument_path=argument_path, output_path=output_path)
+    interpolate_templates(**paths, dry_run=False, translation_service=translation_service)
+    write_csv(template_path, TEMPLATE_COLUMNS, TEMPLATES)
+
+    fingerprinted = []
+    make_fingerprint = AlexlabInterpolation.make_fingerprint
+
+    def counting_make_fingerprint(*args):
+        fingerprinted.append(args)
+        return make_fingerprint(*args)
+
+    monkeypatch.setattr(AlexlabInterpolation, "make_fingerprint", staticmethod(counting_make_fingerprint))
+    estimate = estimate_templates(**paths)
+
+    # Only the two interpolations of the first template exist, each on two platforms
+    assert len(fingerprinted) == 2
+    assert estimate["dup"] == 4
+    assert estimate["new"] == rendered_counts(template_path, argument_path, output_path)["new"] == 12
@@ -0,0 +1,166 @@
+import random
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from alexlab_if import keyword_extraction
+from alexlab_if.interpolate_templates import interpolate_templates
+from alexlab_if.pipeline import run_pipeline
+
+from conftest import argument_row, template_row
+
+
+def pipeline_threads() -> list[threading.Thread]:
+    return [thread for thread in threading.enumerate() if thread.name.startswith("pipeline-stage-")]
+
+
+def jittered(stage):
+    # Stages taking a random time, so that the order doesn't come from them running in lockstep
+    rng = random.Random(0)
+
+    def run(item):
+        time.sleep(rng.random() / 1000)
+        return stage(item)
+    return run
+
+
+def test_items_come_out_in_order():
+    stages = [
+        jittered(lambda item: [item, -item]),
+        jittered(lambda item: [] if item % 3 == 0 else [item * 10]),
+        jittered(lambda item: [(item, "done")]),
+    ]
+
+    results = list(run_pipeline(range(100), stages, queue_size=1))
+
+    expected = [(item * 10, "done") for number in range(100) for item in [number, -number] if item % 3 != 0]
+    assert results == expected
+    assert not pipeline_threads()
+
+
+def test_stages_are_held_back_by_the_consumer():
+    produced = []
+
+    def produce(item):
+        produced.append(item)
+        return [item]
+
+    results = run_pipeline(range(100), [produce, lambda item: [item]], queue_size=2)
+    assert next(results) == 0
+    time.sleep(0.3)
+
+    # Two queues of 2 items, along with the items held by each stage
+    assert len(produced) <= 2 * 2 + 3
+    assert list(results) == list(range(1, 100))
+
+
+def test_the_first_error_is_raised_once_the_stages_stopped():
+    consumed = []
+
+    def fail(item):
+        if item == 5:
+            raise ValueError("Invalid item 5")
+        return [item]
+
+    with pytest.raises(ValueError, match="Invalid item 5"):
+        for item in run_pipeline(range(100), [lambda item: [item], fail, lambda item: [item]]):
+            consumed.append(item)
+
+    assert consumed == [0, 1, 2, 3, 4]
+    assert not pipeline_threads()
+
+
+def test_exits_are_raised_in_the_calling_thread():
+    def exit_(item):
+        raise SystemExit
+
+    with pytest.raises(SystemExit):
+        list(run_pipeline(range(10), [lambda item: [item], exit_]))
+
+    assert not pipeline_threads()
+
+
+def test_queues_are_bounded():
+    with pytest.raises(ValueError):
+        next(run_pipeline(range(10), [lambda item: [item]], queue_size=0))
+
+
+def test_stopping_early_stops_the_stages():
+    results = run_pipeline(range(100), [lambda item: [item], lambda item: [item]])
+
+    assert next(results) == 0
+    results.close()
+
+    assert not pipeline_threads()
+
+
+def test_the_output_doesnt_depend_on_the_queue_size(input_files, translation_service, tmp_path):
+    template_path, argument_path, output_path = input_files(
+        [
+            template_row(template_slug="news", values="What are the latest news about {INDUSTRY}?", min_samples="1"),
+            template_row(),
+        ],
+        [argument_row(value) for value in ["Blockchain", "Robotics", "Gaming"]],
+    )
+
+    outputs = []
+    for queue_size in [1, 8]:
+        path = str(tmp_path / f"actions-{queue_size}.csv")
+        interpolate_templates(
+            output_path=path,
+            input_template_path=template_path,
+            input_argument_path=argument_path,
+            dry_run=False,
+            translation_service=translation_service,
+            pipeline_queue_size=queue_size,
+        )
+        outputs.append(pd.read_csv(path))
+
+    pd.testing.assert_frame_equal(*outputs)
+    # The samples of every template come first
+    assert outputs[0]["slug"].str.split("__").str[0].tolist()[:4] == ["news"] * 2 + ["template"] * 2
+
+
+def test_discarded_arguments_are_reported(input_files, translation_service, capsys):
+    template_path, argument_path, output_path = input_files(
+        [template_row()], [argument_row("Blockchain"), argument_row("Gaming", status="discarded")]
+    )
+
+    interpolate_templates(
+        output_path=output_path,
+        input_template_path=template_path,
+        input_argument_path=argument_path,
+        dry_run=False,
+        translation_service=translation_service,
+    )
+
+    assert "Outdated arguments: Gaming." in capsys.readouterr().out
+    assert set(pd.read_csv(output_path)["slug"].str.split("__").str[3]) == {"blockchain"}
+
+
+def test_missing_stopwords_are_confirmed_before_the_pipeline(monkeypatch, input_files, translation_service, capsys):
+    keyword_extraction._get_stopwords.cache_clear()
+    template_path, argument_path, output_path = input_files(
+        [template_row(target_countries="it", target_languages="it")], [argument_row("Blockchain")]
+    )
+    prompted_threads = []
+
+    def input_(prompt):
+        prompted_threads.append(threading.current_thread())
+        return "n"
+
+    monkeypatch.setattr("builtins.input", input_)
+    with pytest.raises(SystemExit):
+        interpolate_templates(
+            output_path=output_path,
+            input_template_path=template_path,
+            input_argument_path=argument_path,
+            dry_run=False,
+            translation_service=translation_service,
+        )
+
+    assert prompted_threads == [threading.main_thread()]
+    assert "Aborted" in capsys.readouterr().out
+    keyword_extraction._get_stopwords.cache_clear()
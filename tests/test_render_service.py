@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from alexlab_if import render_service
+from alexlab_if.alexlab_models import DiffStatus
+from alexlab_if.render_service import RenderService, make_request_handler
+
+from conftest import ARGUMENT_COLUMNS, argument_row, make_template, write_csv
+
+TEMPLATE = {
+    "template_slug": "served",
+    "values": "What is new in {INDUSTRY}?",
+    "target_countries": ["fr", "de"],
+    "language": "en",
+    "target_languages": ["fr", "de"],
+    "target_platforms": ["copilot", "youtube"],
+    "status": "draft",
+    "experiment_slug": "experiment",
+    "priority": None,
+    "rev_date": "2024-08-05 9:00",
+}
+
+
+@pytest.fixture
+def service(tmp_path, translation_service) -> RenderService:
+    argument_path = write_csv(tmp_path / "arguments.csv", ARGUMENT_COLUMNS, [argument_row("Blockchain"), argument_row("Robotics")])
+    return RenderService(str(tmp_path / "actions.csv"), argument_path, translation_service)
+
+
+@pytest.fixture
+def request_json(service):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_request_handler(service))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def request(path: str, body=None) -> tuple[int, dict]:
+        data = None if body is None else (body if isinstance(body, bytes) else json.dumps(body).encode("utf-8"))
+        try:
+            with urllib.request.urlopen(urllib.request.Request(f"http://127.0.0.1:{server.server_port}{path}", data=data)) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    yield request
+    server.shutdown()
+    server.server_close()
+
+
+def test_render_and_write(request_json, service):
+    assert request_json("/health") == (200, {"status": "ok", "records": 0})
+
+    status, rendered = request_json("/render", TEMPLATE)
+    assert status == 200
+    assert len(rendered["actions"]) == 2 * 2 * 2
+    assert rendered["actions"][0]["values"] == "[fr] What is new in Blockchain?"
+    assert not os.path.exists(service.output_path)
+
+    status, written = request_json("/render", {**TEMPLATE, "write": True})
+    assert status == 200
+    assert [action["diff_status"] for action in written["actions"]] == [DiffStatus.new.value] * 8
+    assert len(pd.read_csv(service.output_path)) == 8
+    assert request_json("/health")[1]["records"] == 8
+
+    # Unchanged actions are only returned on demand
+    assert request_json("/render", {**TEMPLATE, "write": True})[1]["actions"] == []
+    status, unchanged = request_json("/render", {**TEMPLATE, "include_dup": True})
+    assert [action["diff_status"] for action in unchanged["actions"]] == [DiffStatus.dup.value] * 8
+
+
+def test_invalid_requests(request_json):
+    assert request_json("/render", {key: value for key, value in TEMPLATE.items() if key != "values"}) == (
+        400, {"error": "Missing field 'values'"}
+    )
+    assert request_json("/render", {**TEMPLATE, "target_countries": ["xx"]})[0] == 400
+    assert request_json("/render", {**TEMPLATE, "target_countries": 5})[0] == 400
+    assert request_json("/render", [TEMPLATE]) == (400, {"error": "Expected a JSON object"})
+    assert request_json("/render", b"{")[0] == 400
+    assert request_json("/render", {**TEMPLATE, "write": "false"}) == (
+        400, {"error": "Expected a boolean for write, got 'false'"}
+    )
+    assert request_json("/templates")[0] == 404
+    assert request_json("/health", TEMPLATE)[0] == 404
+
+
+def test_render_without_a_translation_service(tmp_path):
+    argument_path = write_csv(tmp_path / "arguments.csv", ARGUMENT_COLUMNS, [argument_row("Blockchain")])
+    service = RenderService(str(tmp_path / "actions.csv"), argument_path)
+
+    actions = service.render(make_template())
+
+    # The interpolations are left in the language of the template
+    assert {action.values for action in actions if action.language == "fr"} == {
+        "What are the main challenges faced by Blockchain?", "what are the main challenges faced by blockchain"
+    }
+    with pytest.raises(ValueError):
+        service.render(make_template(), translate=True)
+
+
+def test_a_failed_save_leaves_the_service_unchanged(monkeypatch, service):
+    def failing_save_actions(output_df, output_path):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(render_service, "save_actions", failing_save_actions)
+    output_df, existing_slugs = service.output_df, service.existing_slugs
+
+    with pytest.raises(OSError):
+        service.render(make_template(), write=True)
+
+    assert service.output_df is output_df and service.output_df.empty
+    assert service.existing_slugs is existing_slugs
+    monkeypatch.undo()
+
+    # The actions are still new, and can be written once saving works again
+    actions = service.render(make_template(), write=True)
+    assert {action.diff_status for action in actions} == {DiffStatus.new}
+    assert len(pd.read_csv(service.output_path)) == len(actions)
@@ -0,0 +1,105 @@
+import pandas as pd
+import pytest
+
+from alexlab_if.alexlab_models import LanguageEnum
+from alexlab_if.interpolate_templates import interpolate_templates
+from alexlab_if.run_journal import RunJournal
+
+from conftest import FakeTranslationService, argument_row, make_template, template_row
+
+TEMPLATES = [
+    template_row(template_slug="news", values="What are the latest news?"),
+    template_row(template_slug="challenges"),
+]
+
+ARGUMENTS = [argument_row("Blockchain"), argument_row("Robotics")]
+
+
+class FailingTranslationService(FakeTranslationService):
+    """
+    Fails once a number of texts have been translated, like a service going down halfway through a run.
+    """
+
+    def __init__(self, fail_after: int):
+        super().__init__(max_attempts=1)
+        self.fail_after = fail_after
+
+    def _remote_translate(self, text, target_lang, source_lang=LanguageEnum.en):
+        if len(self.requested) >= self.fail_after:
+            raise RuntimeError("Translation service is down")
+        return super()._remote_translate(text, target_lang, source_lang)
+
+
+def test_load_recorded_units(tmp_path):
+    journal = RunJournal(str(tmp_path / "actions.csv.journal"))
+    template = make_template()
+
+    journal.open()
+    journal.record_translation("Hello", LanguageEnum.en, LanguageEnum.fr, "Bonjour")
+    journal.record_template(template)
+    journal.close()
+    # A crash may cut the last line short
+    with open(journal.path, "at") as journal_file:
+        journal_file.write('{"unit": "transl')
+
+    translations, completed_templates = journal.load()
+    assert translations == [("Hello", LanguageEnum.en, LanguageEnum.fr, "Bonjour")]
+    assert completed_templates == {RunJournal.template_key(template)}
+
+
+def test_open_refuses_to_discard_a_previous_journal(tmp_path):
+    journal = RunJournal(str(tmp_path / "actions.csv.journal"))
+    journal.open()
+    journal.record_translation("Hello", LanguageEnum.en, LanguageEnum.fr, "Bonjour")
+    journal.close()
+
+    with pytest.raises(FileExistsError):
+        RunJournal(journal.path).open()
+
+    resumed = RunJournal(journal.path)
+    resumed.open(resume=True)
+    resumed.close()
+    assert len(resumed.load()[0]) == 1
+
+
+def test_resume_an_interrupted_run(input_files, translation_service):
+    template_path, argument_path, output_path = input_files(TEMPLATES, ARGUMENTS)
+    paths = dict(input_template_path=template_path, input_argument_path=argument_path, dry_run=False)
+
+    interrupted_service = FailingTranslationService(fail_after=3)
+    with pytest.raises(Exception):
+        interpolate_templates(**paths, output_path=output_path, translation_service=interrupted_service)
+    assert RunJournal(RunJournal.path_for(output_path)).exists()
+
+    # Starting over would lose the journaled translations
+    with pytest.raises(FileExistsError):
+        interpolate_templates(**paths, output_path=output_path, translation_service=FakeTranslationService())
+
+    resumed_service = FakeTranslationService()
+    interpolate_templates(**paths, output_path=output_path, translation_service=resumed_service, resume=True)
+    assert not RunJournal(RunJournal.path_for(output_path)).exists()
+
+    # No translation was requested twice
+    assert not set(interrupted_service.requested) & set(resumed_service.requested)
+
+    uninterrupted_path = output_path.replace("actions", "uninterrupted")
+    interpolate_templates(**paths, output_path=uninterrupted_path, translation_service=translation_service)
+    assert len(interrupted_service.requested) + len(resumed_service.requested) == len(translation_service.requested)
+
+    def by_slug(path):
+        return pd.read_csv(path).sort_values(["slug", "platform"], ignore_index=True)
+    pd.testing.assert_frame_equal(by_slug(output_path), by_slug(uninterrupted_path))
+
+
+def test_only_remote_translations_are_journaled(translation_service):
+    requests = [("Hello", LanguageEnum.en, LanguageEnum.fr), ("Hello", LanguageEnum.en, LanguageEnum.en)]
+    translation_service.warm_cache([("Goodbye", LanguageEnum.en, LanguageEnum.fr, "Au revoir")])
+
+    translated = []
+    def on_translated(*translation):
+        translated.append(translation)
+
+    translation_service.translate_many(requests, on_translated)
+    translation_service.translate_many(requests + [("Goodbye", LanguageEnum.en, LanguageEnum.fr)], on_translated)
+
+    assert translated == [("Hello", LanguageEnum.en, LanguageEnum.fr, "[fr] Hello")]
@@ -0,0 +1,113 @@
+import pandas as pd
+
+from alexlab_if import pipeline
+from alexlab_if.ActionDataFrame import ActionDataFrame
+from alexlab_if.action_stream import diff_interpolations
+from alexlab_if.alexlab_models import CountryEnum, LanguageEnum
+from alexlab_if.existing_actions import build_slug_index
+from alexlab_if.interpolate_templates import interpolate_templates
+from alexlab_if.run_journal import RunJournal
+from alexlab_if.scheduling import RunBudget, split_samples
+from alexlab_if.template_rendering import interpolate_template_and_arguments
+
+from conftest import argument_row, make_arguments, make_template, template_row
+
+ARGUMENTS = [argument_row(value) for value in ["Blockchain", "Robotics", "Gaming"]]
+
+
+def diffs(template):
+    interpolations = interpolate_template_and_arguments(template, make_arguments(*ARGUMENTS), report=False)
+    return diff_interpolations(template, interpolations, build_slug_index(ActionDataFrame()))
+
+
+def test_samples_cover_the_countries_and_languages_first():
+    all_diffs = diffs(make_template())
+    # Already generated on every platform, so nothing to translate
+    all_diffs[1][0].target_platforms = []
+
+    samples, remainder = split_samples(all_diffs, 2)
+
+    assert [(diff[0].country, diff[0].arguments[0]) for diff in samples] == [
+        (CountryEnum.fr, "Blockchain"), (CountryEnum.fr, "Robotics"), (CountryEnum.de, "Blockchain"),
+    ]
+    assert len(remainder) == len(all_diffs) - 3
+    assert split_samples(all_diffs, 0) == ([all_diffs[1]], all_diffs[:1] + all_diffs[2:])
+    assert split_samples(all_diffs, 100) == (all_diffs, [])
+
+
+def test_run_budget(translation_service):
+    unlimited = RunBudget()
+    assert not unlimited.is_limited
+    assert unlimited.exhausted_reason() is None
+    assert unlimited.batch_size(100) == 100
+
+    assert RunBudget(deadline=0).exhausted_reason() == "Deadline of 0s reached"
+
+    budget = RunBudget(translation_budget=3, translation_service=translation_service)
+    assert budget.is_limited
+    assert budget.batch_size(100) == 3
+    translation_service.translate("Hello", LanguageEnum.fr)
+    translation_service.translate("Goodbye", LanguageEnum.fr)
+    assert budget.batch_size(100) == 1
+    assert budget.exhausted_reason() is None
+    translation_service.translate("Thanks", LanguageEnum.fr)
+    assert budget.exhausted_reason() == "Translation budget of 3 reached"
+
+
+def rendered_templates(monkeypatch) -> list[str]:
+    rendered = []
+
+    def counting_interpolate_template_and_arguments(template, *args, **kwargs):
+        rendered.append(template.name)
+        return interpolate_template_and_arguments(template, *args, **kwargs)
+
+    monkeypatch.setattr(pipeline, "interpolate_template_and_arguments", counting_interpolate_template_and_arguments)
+    return rendered
+
+
+def test_templates_without_samples_nor_budget_are_rendered_once(monkeypatch, input_files, translation_service):
+    rendered = rendered_templates(monkeypatch)
+    template_path, argument_path, output_path = input_files(
+        [template_row(template_slug="news", values="What are the latest news about {INDUSTRY}?"), template_row(min_samples="2")],
+        ARGUMENTS,
+    )
+
+    interpolate_templates(
+        output_path=output_path,
+        input_template_path=template_path,
+        input_argument_path=argument_path,
+        dry_run=False,
+        translation_service=translation_service,
+    )
+
+    # The template with samples renders its remainder again in the second pass
+    assert rendered == ["news", "template", "template"]
+    assert len(pd.read_csv(output_path)) == 2 * 2 * 6
+
+
+def test_deferred_remainders_are_filled_in_by_a_resumed_run(monkeypatch, input_files, translation_service, capsys):
+    rendered = rendered_templates(monkeypatch)
+    template_path, argument_path, output_path = input_files(
+        [template_row(template_slug="news", values="What are the latest news about {INDUSTRY}?", priority="2", min_samples="1"), template_row(priority="1", min_samples="1")],
+        ARGUMENTS,
+    )
+    paths = dict(output_path=output_path, input_template_path=template_path, input_argument_path=argument_path, dry_run=False)
+
+    interpolate_templates(**paths, translation_service=translation_service, translation_budget=4)
+
+    # The samples of both templates, the most urgent first, then as much of the remainder as the budget allows
+    assert [text for text, _, _ in translation_service.requested] == [
+        "What are the main challenges faced by Blockchain?",
+        "What are the latest news about Blockchain?",
+        "What are the main challenges faced by Robotics?",
+        "What are the main challenges faced by Gaming?",
+    ]
+    assert rendered == ["template", "news", "template"]
+    assert "template\t1\t3\nnews\t2\t5" in capsys.readouterr().out
+    assert RunJournal(RunJournal.path_for(output_path)).exists()
+
+    interpolate_templates(**paths, translation_service=translation_service, resume=True)
+
+    assert len(translation_service.requested) == 12
+    assert len(pd.read_csv(output_path)) == 2 * 2 * 6
+    assert not RunJournal(RunJournal.path_for(output_path)).exists()
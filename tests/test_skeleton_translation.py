@@ -0,0 +1,101 @@
+import logging
+
+import pandas as pd
+
+from alexlab_if.action_stream import translate_interpolations
+from alexlab_if.alexlab_models import LanguageEnum
+from alexlab_if.existing_actions import latest_rev_records, translation_cache_entries
+from alexlab_if.interpolate_templates import interpolate_templates
+from alexlab_if.skeleton_translation import SKELETON_MARKER, compose_skeleton, template_skeleton
+from alexlab_if.template_rendering import interpolate_template_and_arguments
+
+from conftest import FakeTranslationService, argument_row, make_arguments, make_template, template_row
+
+ARGUMENTS = make_arguments(argument_row("Blockchain"), argument_row("Robotics"))
+
+
+class MarkerDroppingTranslationService(FakeTranslationService):
+    """
+    Loses the skeleton marker, like a translation model rewording it.
+    """
+
+    def _remote_translate(self, text, target_lang, source_lang=LanguageEnum.en):
+        return super()._remote_translate(text, target_lang, source_lang).replace(SKELETON_MARKER, "something")
+
+
+def interpolations(**cells):
+    return interpolate_template_and_arguments(make_template(**cells), ARGUMENTS, report=False)
+
+
+def test_compose_skeleton():
+    skeleton = template_skeleton("Challenges of {{industry}}?", "industry")
+    assert skeleton == f"Challenges of {SKELETON_MARKER}?"
+    assert compose_skeleton(skeleton, f"Les défis de {SKELETON_MARKER} ?", "la blockchain") == "Les défis de la blockchain ?"
+    assert compose_skeleton(skeleton, "Les défis ?", "la blockchain") is None
+
+
+def test_skeleton_translates_templates_and_arguments_once(translation_service):
+    french = interpolations(target_countries="fr", target_languages="fr")
+
+    translate_interpolations(french, translation_service, strategy="skeleton")
+
+    assert [interpolation.text for interpolation in french] == [
+        "[fr] What are the main challenges faced by [fr] Blockchain?",
+        "[fr] What are the main challenges faced by [fr] Robotics?",
+    ]
+    assert all(interpolation.translation_strategy == "skeleton" for interpolation in french)
+    assert [text for text, _, _ in translation_service.requested] == [
+        f"What are the main challenges faced by {SKELETON_MARKER}?", "Blockchain", "Robotics",
+    ]
+
+
+def test_inflected_languages_are_translated_as_full_sentences(translation_service):
+    german = interpolations(target_countries="de", target_languages="de")
+
+    translate_interpolations(german, translation_service, strategy="skeleton")
+
+    assert [interpolation.translation_strategy for interpolation in german] == ["full", "full"]
+    assert len(translation_service.requested) == 2
+
+
+def test_fallback_doesnt_translate_the_arguments(caplog):
+    translation_service = MarkerDroppingTranslationService()
+    french = interpolations(target_countries="fr", target_languages="fr")
+
+    with caplog.at_level(logging.WARNING):
+        translate_interpolations(french, translation_service, strategy="skeleton")
+
+    assert "didn't survive the translation of 2 skeletons" in caplog.text
+    assert [interpolation.text for interpolation in french] == [
+        "[fr] What are the main challenges faced by Blockchain?",
+        "[fr] What are the main challenges faced by Robotics?",
+    ]
+    assert all(interpolation.translation_strategy == "full" for interpolation in french)
+    # Only the skeleton and the full sentences were requested, none of the arguments on their own
+    assert [text for text, _, _ in translation_service.requested] == [
+        f"What are the main challenges faced by {SKELETON_MARKER}?",
+        "What are the main challenges faced by Blockchain?",
+        "What are the main challenges faced by Robotics?",
+    ]
+
+
+def test_composed_translations_dont_warm_the_cache(input_files, translation_service):
+    template_path, argument_path, output_path = input_files(
+        [template_row(target_countries="fr", target_languages="fr", target_platforms="copilot")],
+        [argument_row("Blockchain", target_countries="fr")],
+    )
+    interpolate_templates(
+        output_path=output_path,
+        input_template_path=template_path,
+        input_argument_path=argument_path,
+        dry_run=False,
+        translation_service=translation_service,
+        translation_strategy="skeleton",
+    )
+
+    records = latest_rev_records(pd.read_csv(output_path))
+    assert records["translation_strategy"].tolist() == ["skeleton"]
+    assert translation_cache_entries(records) == []
+
+    records["translation_strategy"] = "full"
+    assert len(translation_cache_entries(records)) == 1
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from alexlab_if.slug_table import SlugTable
+
+from benchmarks.slug_index_memory import synthetic_records
+
+
+def test_extend_is_the_same_as_building_the_table_again():
+    records = synthetic_records(3000)
+    existing, added = records.iloc[:2000], records.iloc[2000:]
+    # Records written since the table was built, superseding existing ones
+    superseding = existing.iloc[::100].assign(rev_date="2024-09-01 9:00", fingerprint=None)
+    superseding.index = range(3000, 3000 + len(superseding))
+
+    table = SlugTable(existing).extend(pd.concat([added, superseding]))
+
+    rebuilt = SlugTable(pd.concat([existing, added, superseding]))
+    for array in ["_order", "hashes", "ids", "rev_epochs", "fingerprints", "has_fingerprints"]:
+        assert np.array_equal(getattr(table, array), getattr(rebuilt, array)), array
+
+    slug = f"{existing['slug'].iloc[0]}__{existing['platform'].iloc[0]}"
+    assert table[slug] == {"id": 3000, "rev_date": "2024-09-01 9:00", "fingerprint": None}
+    # The superseded slugs are only counted once
+    assert len(table) == 3000
+    assert table.records == 3000 + len(superseding)
+
+
+def test_extend_an_empty_table():
+    records = synthetic_records(10)
+
+    table = SlugTable(records.iloc[:0]).extend(records)
+
+    assert list(table) == list(SlugTable(records))
+    assert all(slug in table for slug in SlugTable(records))
+
+
+def test_colliding_hashes_are_told_apart(monkeypatch):
+    records = synthetic_records(20)
+    records = pd.concat([records, records.iloc[:5]], ignore_index=True)
+    monkeypatch.setattr(SlugTable, "hash_slugs", staticmethod(lambda slugs: np.zeros(len(slugs), dtype=np.uint64)))
+
+    table = SlugTable(records)
+
+    assert table.records == 25
+    assert len(table) == len(list(table)) == 20
+    slug = f"{records['slug'].iloc[0]}__{records['platform'].iloc[0]}"
+    assert table[slug]["id"] == 20
@@ -0,0 +1,126 @@
+import argparse
+import sys
+import threading
+import time
+import types
+from collections import Counter
+
+import pytest
+
+from alexlab_if.alexlab_models import LanguageEnum
+from alexlab_if.translation import TranslationEndpoint, TranslationService
+from alexlab_if.utils import translation_endpoint
+
+
+def test_translation_endpoint_argument():
+    assert translation_endpoint("aiforensics/opus-mt-translation-ce") == ("aiforensics/opus-mt-translation-ce", 1.0)
+    assert translation_endpoint("localhost:7860=2") == ("localhost:7860", 2.0)
+    assert translation_endpoint("localhost:7860=0.5") == ("localhost:7860", 0.5)
+
+    for arg in ["localhost:7860=0", "localhost:7860=-1"]:
+        with pytest.raises(argparse.ArgumentTypeError):
+            translation_endpoint(arg)
+
+
+def test_endpoint_weight_must_be_positive():
+    with pytest.raises(ValueError):
+        TranslationEndpoint("localhost:7860", None, weight=0)
+    with pytest.raises(ValueError):
+        TranslationService(["localhost:7860", "localhost:7861"], None, weights=[1, -1])
+
+
+def test_requests_are_spread_by_weight():
+    service = TranslationService(["localhost:7860", "localhost:7861"], None, weights=[2, 1])
+
+    acquired = [service._acquire_endpoint() for _ in range(6)]
+
+    assert Counter(endpoint.gradio_src for endpoint in acquired) == {"localhost:7860": 4, "localhost:7861": 2}
+
+
+def test_concurrent_translations_share_a_single_client(monkeypatch):
+    created = []
+
+    class Client:
+        def __init__(self, src, hf_token):
+            # Slow enough for the threads to race
+            time.sleep(0.05)
+            created.append(src)
+
+    monkeypatch.setitem(sys.modules, "gradio_client", types.SimpleNamespace(Client=Client))
+    endpoint = TranslationEndpoint("localhost:7860", None)
+
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(endpoint.get_gradio_client())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert created == ["localhost:7860"]
+    assert all(client is clients[0] for client in clients)
+
+
+class StubClient:
+    """
+    A Gradio client failing with the errors queued for it, and translating otherwise.
+    """
+    errors: list[Exception] = []
+    predicted: list[str] = []
+
+    def __init__(self, src, hf_token):
+        pass
+
+    def predict(self, text, source_lang, target_lang, api_name):
+        StubClient.predicted.append(text)
+        if StubClient.errors:
+            raise StubClient.errors.pop(0)
+        return f"[{target_lang}] {text}"
+
+
+@pytest.fixture
+def stub_client(monkeypatch):
+    import gradio_client
+
+    monkeypatch.setattr(gradio_client, "Client", StubClient)
+    monkeypatch.setattr(StubClient, "errors", [])
+    monkeypatch.setattr(StubClient, "predicted", [])
+    return StubClient
+
+
+def http_status_error(status_code: int):
+    import httpx
+
+    request = httpx.Request("POST", "http://localhost:7860/predict")
+    return httpx.HTTPStatusError("Error", request=request, response=httpx.Response(status_code, request=request))
+
+
+def test_rejected_requests_fail_at_once(stub_client):
+    service = TranslationService("localhost:7860", None, max_failures=1, cooldown=60)
+    endpoint = service.endpoints[0]
+
+    for error in [ValueError("Unsupported language pair"), http_status_error(400)]:
+        stub_client.errors.append(error)
+        with pytest.raises(type(error)):
+            service.translate("Hello", LanguageEnum.fr)
+
+    assert stub_client.predicted == ["Hello", "Hello"]
+    assert endpoint.consecutive_failures == 0
+    assert endpoint.is_available(time.monotonic())
+    assert service.translate("Hello", LanguageEnum.fr) == "[fr] Hello"
+
+
+def test_unavailable_endpoints_are_retried_and_ejected(stub_client):
+    import httpx
+
+    service = TranslationService("localhost:7860", None, max_failures=2, cooldown=0.2, max_attempts=3)
+    endpoint = service.endpoints[0]
+
+    stub_client.errors += [httpx.ConnectError("Connection refused"), http_status_error(503)]
+    assert service.translate("Hello", LanguageEnum.fr) == "[fr] Hello"
+    assert (endpoint.errors, endpoint.consecutive_failures) == (2, 0)
+
+    stub_client.errors += [httpx.ReadTimeout("Timed out")] * 3
+    with pytest.raises(Exception, match="timed out"):
+        service.translate("Goodbye", LanguageEnum.fr)
+    assert endpoint.errors == 5
+    assert not endpoint.is_available(time.monotonic())
@@ -0,0 +1,78 @@
+import logging
+
+import pytest
+
+from alexlab_if.alexlab_models import LanguageEnum
+from alexlab_if.translation_memory import TranslationMemory
+
+from conftest import FakeTranslationService
+
+TRANSLATED = "What are the main challenges faced by the blockchain industry?"
+# 0.9 similar to the translated text, only differing by the word that matters
+NEAR = "What are the main challenges faced by the blockchain industries?"
+
+
+def memory_service(policy: str, threshold: float = 0.85) -> FakeTranslationService:
+    translation_service = FakeTranslationService(memory=TranslationMemory(threshold=threshold, policy=policy))
+    translation_service.warm_cache([(TRANSLATED, LanguageEnum.en, LanguageEnum.fr, "Les défis de l'industrie de la blockchain ?")])
+    return translation_service
+
+
+@pytest.mark.parametrize("policy", ["flag", "reuse"])
+def test_identical_texts_are_always_reused(policy):
+    translation_service = memory_service(policy)
+
+    assert translation_service.translate(f"  {TRANSLATED.replace(' ', '  ')}", LanguageEnum.fr) == "Les défis de l'industrie de la blockchain ?"
+    # Only within the same language pair
+    assert translation_service.translate(TRANSLATED, LanguageEnum.de) == f"[de] {TRANSLATED}"
+
+    assert translation_service.requested == [(TRANSLATED, LanguageEnum.en, LanguageEnum.de)]
+    assert translation_service.memory.exact_hits == 1
+    assert translation_service.memory.avoided == 1
+
+
+def test_near_matches_are_flagged(caplog):
+    translation_service = memory_service("flag")
+
+    with caplog.at_level(logging.WARNING):
+        assert translation_service.translate(NEAR, LanguageEnum.fr) == f"[fr] {NEAR}"
+
+    assert f"{NEAR!r} is 0.90 similar to the already translated {TRANSLATED!r}" in caplog.text
+    assert translation_service.memory.flagged == 1
+    assert translation_service.memory.avoided == 0
+    # The remote translation is remembered, and then reused as an identical text
+    assert translation_service.memory.lookup(NEAR, LanguageEnum.en, LanguageEnum.fr).is_exact
+
+
+def test_near_matches_are_reused():
+    translation_service = memory_service("reuse")
+
+    assert translation_service.translate(NEAR, LanguageEnum.fr) == "Les défis de l'industrie de la blockchain ?"
+
+    assert translation_service.requested == []
+    assert translation_service.memory.reused == 1
+    assert translation_service.memory.avoided == 1
+
+
+def test_texts_below_the_threshold_are_translated():
+    translation_service = memory_service("reuse", threshold=0.95)
+
+    assert translation_service.translate(NEAR, LanguageEnum.fr) == f"[fr] {NEAR}"
+    assert translation_service.memory.lookup("Who won the football match?", LanguageEnum.en, LanguageEnum.fr) is None
+    assert translation_service.memory.reused == 0
+
+
+def test_lookup_finds_the_most_similar_translation():
+    memory = TranslationMemory(threshold=0.6)
+    memory.add("What are the latest news?", LanguageEnum.en, LanguageEnum.fr, "Quelles sont les dernières nouvelles ?")
+    memory.add(TRANSLATED, LanguageEnum.en, LanguageEnum.fr, "Les défis de l'industrie de la blockchain ?")
+
+    match = memory.lookup(NEAR, LanguageEnum.en, LanguageEnum.fr)
+
+    assert (match.source_text, match.is_exact) == (TRANSLATED, False)
+    assert match.similarity == pytest.approx(0.9, abs=0.01)
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        TranslationMemory(policy="always")
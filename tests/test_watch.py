@@ -0,0 +1,93 @@
+import os
+
+import pandas as pd
+
+from alexlab_if import watch
+from alexlab_if.alexlab_models import LanguageEnum
+from alexlab_if.watch import watch_templates
+
+from conftest import FakeTranslationService, TEMPLATE_COLUMNS, argument_row, template_row, write_csv
+
+ARGUMENTS = [argument_row("Blockchain"), argument_row("Robotics")]
+
+
+def edit_templates(path: str, template_rows: list[dict]):
+    write_csv(path, TEMPLATE_COLUMNS, template_rows)
+    # Some file systems don't tell apart modifications within the same second
+    os.utime(path, ns=(0, 0))
+
+
+class UnavailableTranslationService(FakeTranslationService):
+    """
+    Fails while it is marked as unavailable.
+    """
+
+    def __init__(self):
+        super().__init__(max_attempts=1)
+        self.available = True
+
+    def _remote_translate(self, text, target_lang, source_lang=LanguageEnum.en):
+        if not self.available:
+            raise RuntimeError("Translation service is unavailable")
+        return super()._remote_translate(text, target_lang, source_lang)
+
+
+def test_failed_templates_are_retried_without_a_change(monkeypatch, input_files):
+    template_path, argument_path, output_path = input_files([template_row()], ARGUMENTS)
+    translation_service = UnavailableTranslationService()
+    checks = []
+
+    def sleep(seconds):
+        checks.append(len(translation_service.requested))
+        if len(checks) == 1:
+            # The service goes down as a template is added
+            translation_service.available = False
+            edit_templates(template_path, [
+                template_row(),
+                template_row(template_slug="news", values="What are the latest news about {INDUSTRY}?"),
+            ])
+        elif len(checks) == 2:
+            translation_service.available = True
+        elif len(checks) == 3:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(watch.time, "sleep", sleep)
+    watch_templates(
+        output_path=output_path,
+        input_template_path=template_path,
+        input_argument_path=argument_path,
+        translation_service=translation_service,
+        poll_interval=0,
+    )
+
+    # Both templates were written, the second once the service was back, without any other change of the files
+    assert checks == [4, 4, 8]
+    output_df = pd.read_csv(output_path)
+    assert len(output_df) == 2 * 4 * 2
+    assert set(output_df["slug"].str.split("__").str[0]) == {"template", "news"}
+
+
+def test_removed_templates_keep_their_actions(monkeypatch, input_files, translation_service, capsys):
+    template_path, argument_path, output_path = input_files(
+        [template_row(), template_row(template_slug="news", values="What are the latest news about {INDUSTRY}?")], ARGUMENTS
+    )
+    checks = []
+
+    def sleep(seconds):
+        checks.append(seconds)
+        if len(checks) == 1:
+            edit_templates(template_path, [template_row()])
+        else:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(watch.time, "sleep", sleep)
+    watch_templates(
+        output_path=output_path,
+        input_template_path=template_path,
+        input_argument_path=argument_path,
+        translation_service=translation_service,
+        poll_interval=0,
+    )
+
+    assert "Input files changed: 0 templates affected, news removed and their actions kept" in capsys.readouterr().out
+    assert len(pd.read_csv(output_path)) == 2 * 4 * 2